@@ -0,0 +1,56 @@
+'''
+Benchmark the cost of importing runtimedocs with python -X importtime.
+
+usage: python benchmarks/import_time.py [-n 20]
+
+Reports the median cumulative import time of the runtimedocs package and lists the modules its import pulls in
+on top of the ones already imported by the interpreter startup.
+'''
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def importtime(statement):
+    '''
+    runs a statement in a fresh interpreter with -X importtime.
+
+    Returns
+    -------
+    timings: list of tuple(module_name, self_us, cumulative_us) in the order the imports completed.
+    '''
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    output = subprocess.check_output([sys.executable, '-X', 'importtime', '-c', statement],
+                                     stderr=subprocess.STDOUT, env=env, cwd=ROOT).decode('utf-8')
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        timings.append((name.strip(), int(self_us), int(cumulative_us)))
+    return timings
+
+
+def imported_modules(statement):
+    '''returns the set of modules imported by a statement on top of the ones imported by the interpreter startup.'''
+    startup = set(name for name, _, _ in importtime('pass'))
+    return set(name for name, _, _ in importtime(statement)) - startup
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', '--runs', type=int, default=20, help='number of fresh interpreters to time.')
+    options = parser.parse_args(argv)
+
+    cumulative = sorted(dict((name, cum) for name, _, cum in importtime('import runtimedocs'))['runtimedocs']
+                        for _ in range(options.runs))
+    print('import runtimedocs: median={}us min={}us over {} runs'.format(
+        cumulative[len(cumulative) // 2], cumulative[0], options.runs))
+    print('modules imported: {}'.format(', '.join(sorted(imported_modules('import runtimedocs')))))
+
+
+if __name__ == '__main__':
+    main()
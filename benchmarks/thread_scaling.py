@@ -0,0 +1,73 @@
+'''
+Benchmark the throughput of decorated functions called from a growing number of threads.
+
+usage: python benchmarks/thread_scaling.py [--calls 2000] [--threads 1 2 4 8 16 32 64]
+
+Compares the default recording path, where every line goes through the logging locks on the calling thread,
+with the thread buffered one (thread_buffered=True), where each thread appends its calls to its own buffer and
+a collector thread writes them. The log files are written to a temporary directory.
+'''
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from runtimedocs import runtimedocs, buffering
+from runtimedocs.governor import timer
+
+
+def make_function(name, thread_buffered):
+    @runtimedocs(custom_logger_name=name, thread_buffered=thread_buffered)
+    def work(elements, scale=1):
+        return sum(elements) * scale
+    return work
+
+
+def throughput(func, n_threads, n_calls):
+    '''returns the number of decorated calls per second done by n_threads threads doing n_calls calls each.'''
+    barrier = threading.Barrier(n_threads + 1)
+
+    def worker():
+        barrier.wait()
+        for i in range(n_calls):
+            func([i, 1, 2], scale=2)
+
+    threads = [threading.Thread(target=worker) for _ in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    tic = timer()
+    for thread in threads:
+        thread.join()
+    # the buffered calls are only done once they are written.
+    buffering.flush()
+    return n_threads * n_calls / (timer() - tic)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=2000, help='number of calls per thread.')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32, 64])
+    options = parser.parse_args(argv)
+
+    cwd = os.getcwd()
+    tmp_dir = tempfile.mkdtemp()
+    os.chdir(tmp_dir)
+    try:
+        print('{:>8} | {:>16} | {:>16} | {:>7}'.format('threads', 'default calls/s', 'buffered calls/s', 'speedup'))
+        for n_threads in options.threads:
+            default = throughput(make_function('default_{}'.format(n_threads), False), n_threads, options.calls)
+            buffered = throughput(make_function('buffered_{}'.format(n_threads), True), n_threads, options.calls)
+            print('{:>8} | {:>16.0f} | {:>16.0f} | {:>6.2f}x'.format(n_threads, default, buffered,
+                                                                    buffered / default))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
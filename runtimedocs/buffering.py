@@ -0,0 +1,126 @@
+import atexit
+import logging
+import sys
+import threading
+import time
+from collections import deque
+
+
+class LogBlock(object):
+    '''
+    Logger-like object collecting the lines logged for a single call, so they can be recorded at once
+    in the buffer of the calling thread and written contiguously.
+    '''
+
+    def __init__(self):
+        self.entries = []
+
+    def log(self, level, msg, exc_info=False):
+        if exc_info:
+            # the traceback has to be captured now, it is only formatted later by the collector.
+            exc_info = sys.exc_info()
+        self.entries.append((level, msg, exc_info or None, time.time()))
+
+    def info(self, msg):
+        self.log(logging.INFO, msg)
+
+    def warning(self, msg):
+        self.log(logging.WARNING, msg)
+
+    def error(self, msg, exc_info=False):
+        self.log(logging.ERROR, msg, exc_info=exc_info)
+
+    def defer(self, render, level=logging.INFO):
+        '''adds a callable returning the lines to log, it will be called by the collector thread.'''
+        self.entries.append((level, render, None, time.time()))
+
+
+class ThreadBufferedRecorder(object):
+    '''
+    Records the log blocks of the decorated calls without going through the logging locks on the calling threads.
+    The deferred entries of the blocks (see LogBlock.defer) are rendered by the collector thread.
+
+    Each thread appends its blocks to its own buffer, a deque whose appends are thread-safe without locking.
+    A collector daemon thread drains all the buffers every flush_interval seconds, or as soon as a buffer holds
+    batch_size blocks, and hands the records to the loggers. The records keep the time at which they were logged
+    and the id/name of the thread that logged them. The buffers are also drained when the program exits.
+
+    Parameters
+    ----------
+    flush_interval: float | DEFAULT = 0.1
+        maximum number of seconds between two drains of the buffers.
+    batch_size: int | DEFAULT = 1000
+        number of blocks pending in a thread buffer above which the collector is woken up early.
+    '''
+
+    def __init__(self, flush_interval=0.1, batch_size=1000):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._local = threading.local()
+        # list of (thread, buffer), the lock is only taken when a thread records its first block and when draining.
+        self._buffers = []
+        self._buffers_lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._collector = None
+
+    def _buffer(self):
+        try:
+            return self._local.buffer
+        except AttributeError:
+            buffer = self._local.buffer = deque()
+            with self._buffers_lock:
+                self._buffers.append((threading.current_thread(), buffer))
+                if self._collector is None:
+                    self._collector = threading.Thread(target=self._collect, name='runtimedocs-collector')
+                    self._collector.daemon = True
+                    self._collector.start()
+                    atexit.register(self.flush)
+            return buffer
+
+    def record(self, logger, block):
+        '''appends the entries of a LogBlock to the buffer of the current thread.'''
+        if not block.entries:
+            return
+        buffer = self._buffer()
+        buffer.append((logger, block.entries))
+        if len(buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def _collect(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                # the collector must survive a failing handler, like logging itself does.
+                pass
+
+    def flush(self):
+        '''drains the buffers of all threads and hands their records to the loggers.'''
+        with self._drain_lock:
+            with self._buffers_lock:
+                buffers = list(self._buffers)
+            for thread, buffer in buffers:
+                while buffer:
+                    logger, entries = buffer.popleft()
+                    for level, msg, exc_info, created in entries:
+                        for line in (msg() if callable(msg) else [msg]):
+                            record = logger.makeRecord(logger.name, level, '(runtimedocs)', 0, line, (), exc_info)
+                            record.created = created
+                            record.msecs = (created - int(created)) * 1000
+                            record.thread = thread.ident
+                            record.threadName = thread.name
+                            logger.handle(record)
+                if not thread.is_alive() and not buffer:
+                    with self._buffers_lock:
+                        self._buffers.remove((thread, buffer))
+
+
+default_recorder = ThreadBufferedRecorder()
+
+
+def flush():
+    '''writes the records still pending in the buffers of the default recorder.'''
+    default_recorder.flush()
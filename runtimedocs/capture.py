@@ -0,0 +1,164 @@
+import hashlib
+import pickle
+import random
+import struct
+import threading
+import zlib
+
+# every record of a capture file is prefixed by its length encoded as a big-endian unsigned int.
+_header = struct.Struct('>I')
+
+
+def serialize_inputs(args, kwargs):
+    '''
+    serializes the inputs of a call with pickle, falling back to dill and cloudpickle when they are installed.
+
+    Parameters
+    ----------
+    args: tuple of the positional arguments
+    kwargs: dict of the key word arguments
+
+    Returns
+    -------
+    payload: bytes | None
+        the serialized (args, kwargs) or None if none of the serializers could handle them.
+    '''
+    try:
+        return pickle.dumps((args, kwargs), pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        pass
+    for module_name in ('dill', 'cloudpickle'):
+        try:
+            serializer = __import__(module_name)
+            return serializer.dumps((args, kwargs))
+        except Exception:
+            continue
+    return None
+
+
+def deserialize_inputs(payload):
+    '''reverse of serialize_inputs, returns the tuple (args, kwargs).'''
+    try:
+        return pickle.loads(payload)
+    except Exception:
+        for module_name in ('dill', 'cloudpickle'):
+            try:
+                return __import__(module_name).loads(payload)
+            except Exception:
+                continue
+        raise
+
+
+def iter_records(path):
+    '''
+    reads a capture file.
+
+    Returns
+    -------
+    records: generator of tuple(function_key, digest, payload)
+        payload is the serialized (args, kwargs), see deserialize_inputs.
+    '''
+    with open(path, 'rb') as f:
+        while True:
+            header = f.read(_header.size)
+            if len(header) < _header.size:
+                return
+            size, = _header.unpack(header)
+            data = f.read(size)
+            if len(data) < size:
+                # truncated record, the process writing it was probably killed.
+                return
+            yield pickle.loads(zlib.decompress(data))
+
+
+def iter_captures(path, key=None):
+    '''
+    reads the inputs captured in a capture file.
+
+    Parameters
+    ----------
+    path: path of the capture file
+    key: if specified only the inputs captured for this function key are returned.
+
+    Returns
+    -------
+    captures: generator of tuple(function_key, args, kwargs)
+    '''
+    for func_key, digest, payload in iter_records(path):
+        if key is None or func_key == key:
+            args, kwargs = deserialize_inputs(payload)
+            yield func_key, args, kwargs
+
+
+class CaptureStore(object):
+    '''
+    Append-only store of the inputs received by decorated functions, used to replay realistic calls offline.
+    See runtimedocs.replay.
+
+    Each call is sampled with probability `sample_rate`, its inputs are serialized (see serialize_inputs),
+    dropped if larger than `max_bytes` and deduplicated by the sha1 of their serialized content.
+    The kept records are zlib compressed and appended to the file at `path`.
+
+    Parameters
+    ----------
+    path: str
+        path of the capture file, created if it does not exist, appended to otherwise.
+    sample_rate: float | DEFAULT = 0.01
+        probability for a given call to have its inputs captured.
+    max_bytes: int | DEFAULT = 1048576
+        inputs whose serialized size exceeds this value are not captured.
+    '''
+
+    def __init__(self, path, sample_rate=0.01, max_bytes=1024 * 1024):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self.stats = dict(captured=0, duplicated=0, too_large=0, unserializable=0)
+        self._lock = threading.Lock()
+        self._file = None
+        self._digests = set()
+        try:
+            for func_key, digest, payload in iter_records(path):
+                self._digests.add((func_key, digest))
+        except (IOError, OSError):
+            pass
+
+    def capture(self, key, args, kwargs):
+        '''
+        captures the inputs of a call if it is sampled.
+
+        Returns
+        -------
+        captured: bool
+            True if the inputs were appended to the store.
+        '''
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return False
+
+        payload = serialize_inputs(args, kwargs)
+        if payload is None:
+            self.stats['unserializable'] += 1
+            return False
+        if len(payload) > self.max_bytes:
+            self.stats['too_large'] += 1
+            return False
+
+        digest = hashlib.sha1(payload).hexdigest()
+        data = zlib.compress(pickle.dumps((key, digest, payload), pickle.HIGHEST_PROTOCOL))
+        with self._lock:
+            if (key, digest) in self._digests:
+                self.stats['duplicated'] += 1
+                return False
+            self._digests.add((key, digest))
+            if self._file is None:
+                self._file = open(self.path, 'ab')
+            self._file.write(_header.pack(len(data)) + data)
+            self._file.flush()
+            self.stats['captured'] += 1
+        return True
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,165 @@
+import atexit
+import threading
+import time
+from collections import OrderedDict
+
+# callbacks logging the runs still pending when the program exits, see register.
+_pending_runs_loggers = []
+
+
+class CallCoalescer(object):
+    '''
+    Collapses the consecutive calls of a decorated function sharing the same key, ie: the same caller and
+    called signature, into runs.
+
+    Only the first call of a run is logged in details, the following ones are only counted and timed and the run
+    is logged as a single summary once it ends. A run ends when a call with another key is made, when a call of
+    the run raises an exception or has an outlier duration, or after max_run_length calls.
+
+    Parameters
+    ----------
+    max_run_length: int | DEFAULT = 1000
+        a summary is logged every max_run_length calls of a run, so that endless loops are reported too.
+    outlier_factor: float | DEFAULT = 3.0
+        a call lasting more than outlier_factor times the mean duration of the run deviates from it.
+    min_outlier_run: int | DEFAULT = 5
+        number of calls in a run before outlier durations are looked for.
+    min_outlier_duration: float | DEFAULT = 0.001
+        calls lasting less than this number of seconds are never outliers, so that the jitter of very fast calls
+        does not end their runs.
+    '''
+
+    def __init__(self, max_run_length=1000, outlier_factor=3.0, min_outlier_run=5, min_outlier_duration=0.001):
+        self.max_run_length = max_run_length
+        self.outlier_factor = outlier_factor
+        self.min_outlier_run = min_outlier_run
+        self.min_outlier_duration = min_outlier_duration
+        self.lock = threading.Lock()
+        self.key = None
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.first = None
+        self.last = None
+        self.total_duration = 0.0
+        self.min_duration = None
+        self.max_duration = None
+        # whether the first call of the run was logged in details, it is not when the run continues a previous
+        # one after a flush or max_run_length calls.
+        self.first_logged = False
+
+    def add(self, duration):
+        now = time.time()
+        self.count += 1
+        self.first = self.first if self.first is not None else now
+        self.last = now
+        self.total_duration += duration
+        self.min_duration = duration if self.min_duration is None else min(self.min_duration, duration)
+        self.max_duration = duration if self.max_duration is None else max(self.max_duration, duration)
+
+    def close(self):
+        '''
+        ends the current run.
+
+        Returns
+        -------
+        summary: OrderedDict('key', 'count', 'first', 'last', 'min', 'mean', 'max') | None
+            None if the run has no call, or a single one which was already logged in details.
+        '''
+        summary = None
+        if self.count > 1 or (self.count == 1 and not self.first_logged):
+            summary = OrderedDict(key=self.key, count=self.count, first=self.first, last=self.last,
+                                  min=self.min_duration, mean=self.total_duration / self.count,
+                                  max=self.max_duration)
+        self.reset()
+        return summary
+
+    def flush(self):
+        '''ends the current run but keeps its key, so that the next calls still continue it. see close.'''
+        with self.lock:
+            return self.close()
+
+    def begin(self, key):
+        '''
+        called before a call with its key.
+
+        Returns
+        -------
+        repeated: bool
+            True if the call continues the current run and should not be logged in details.
+        summary: OrderedDict | None
+            summary of the run that ended because of this call, see close.
+        '''
+        with self.lock:
+            if key == self.key:
+                return True, None
+            summary = self.close()
+            self.key = key
+            self.first_logged = True
+            return False, summary
+
+    def end(self, repeated, duration, failed=False):
+        '''
+        called after a call with the value of repeated returned by begin.
+
+        Returns
+        -------
+        deviating: bool
+            True if the call was part of a run but deviates from it and should be logged in details.
+        summary: OrderedDict | None
+            summary of the run that ended because of this call, see close.
+        '''
+        with self.lock:
+            if failed:
+                # the run ends with a failing call, so the next call starts a new one.
+                summary = self.close()
+                self.key = None
+                return repeated, summary
+
+            if repeated and self.count >= self.min_outlier_run and duration > self.min_outlier_duration and \
+                    duration > self.outlier_factor * self.total_duration / self.count:
+                summary = self.close()
+                # the outlier call is logged in details and starts a new run.
+                self.add(duration)
+                self.first_logged = True
+                return True, summary
+
+            self.add(duration)
+            summary = self.close() if self.count >= self.max_run_length else None
+            return False, summary
+
+
+def _format_time(timestamp):
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp)) + ',{:03d}'.format(
+        int(timestamp % 1 * 1000))
+
+
+def format_summary(func_name, summary):
+    '''formats the summary of a run as a single line.'''
+    caller, called_signature = summary['key']
+    return '[{}] was called [{}] times in a row by [{}] with the called signature ({}) between [{}] and [{}]: ' \
+           'min=[{}]s mean=[{}]s max=[{}]s'.format(
+        func_name,
+        summary['count'],
+        caller,
+        called_signature,
+        _format_time(summary['first']),
+        _format_time(summary['last']),
+        round(summary['min'], 6),
+        round(summary['mean'], 6),
+        round(summary['max'], 6),
+    )
+
+
+def register(log_pending_run):
+    '''registers a callback logging the pending run of a decorated function, called by flush and at exit.'''
+    if not _pending_runs_loggers:
+        atexit.register(flush)
+    _pending_runs_loggers.append(log_pending_run)
+
+
+def flush():
+    '''logs the summaries of the runs still pending for all the decorated functions.'''
+    for log_pending_run in list(_pending_runs_loggers):
+        log_pending_run()
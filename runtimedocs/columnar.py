@@ -0,0 +1,299 @@
+'''
+Export the metrics of the decorated calls as columns, for vectorized analysis with numpy.
+
+Each call becomes a row of these columns: function, timestamp, duration, cpu_time, outcome, n_args, n_kwargs,
+args_len. The rows are written by chunks in a directory, each chunk being a numpy .npz file holding one array per
+column, and the functions are stored as integer codes whose names are listed in the functions.json file.
+
+usage: python -m runtimedocs.columnar output_dir my_module.my_func.runtimedocs.log [other log files ...]
+converts existing runtimedocs log files, along with their rotated segments, to this format.
+'''
+import argparse
+import array
+import atexit
+import glob
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# column name -> (array.array typecode used while buffering, numpy dtype of the written column)
+COLUMNS = OrderedDict([
+    ('function', ('i', 'int32')),
+    ('timestamp', ('d', 'float64')),
+    ('duration', ('d', 'float64')),
+    ('cpu_time', ('d', 'float64')),
+    ('outcome', ('b', 'int8')),
+    ('n_args', ('i', 'int32')),
+    ('n_kwargs', ('i', 'int32')),
+    ('args_len', ('q', 'int64')),
+])
+
+SUCCESS = 0
+EXCEPTION = 1
+
+# cpu time of the current thread when available, of the whole process otherwise.
+cpu_timer = getattr(time, 'thread_time', getattr(time, 'process_time', getattr(time, 'clock', time.time)))
+
+FUNCTIONS_FILENAME = 'functions.json'
+CHUNK_FILENAME = 'chunk-{:06d}.npz'
+
+
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('the columnar export of runtimedocs requires numpy: pip install numpy')
+    return numpy
+
+
+def args_len(args, kwargs):
+    '''helper function to get the sum of the lengths of the sized parameters of a call, -1 if none is sized.'''
+    total = -1
+    for arg in args + tuple(kwargs.values()):
+        if hasattr(arg, '__len__'):
+            try:
+                total = max(total, 0) + len(arg)
+            except Exception:
+                pass
+    return total
+
+
+class ColumnarExporter(object):
+    '''
+    Appends the metrics of calls, as rows, to a directory of columnar chunks.
+
+    The rows are buffered in compact typed arrays and written as a new chunk every chunk_size rows, so the memory
+    used stays bounded. The rows still buffered are written by flush, which is also called at exit.
+    Appending to an existing directory keeps its function codes and continues its chunks numbering.
+
+    Parameters
+    ----------
+    directory: str
+        where to write the chunks, created if it does not exist.
+    chunk_size: int | DEFAULT = 65536
+        number of rows per chunk.
+    '''
+
+    def __init__(self, directory, chunk_size=65536):
+        self.numpy = _import_numpy()
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.lock = threading.Lock()
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        self.function_names = read_function_names(directory)
+        self.function_codes = dict((name, code) for code, name in enumerate(self.function_names))
+        self.n_function_names_written = len(self.function_names)
+        self.next_chunk = len(glob.glob(os.path.join(directory, 'chunk-*.npz')))
+        self._reset_columns()
+        atexit.register(self.flush)
+
+    def _reset_columns(self):
+        self.columns = OrderedDict((name, array.array(typecode)) for name, (typecode, _) in COLUMNS.items())
+
+    def record(self, function_name, timestamp, duration, cpu_time, outcome, n_args, n_kwargs, args_len):
+        '''appends a row, writes a chunk when chunk_size rows are buffered.'''
+        with self.lock:
+            code = self.function_codes.get(function_name)
+            if code is None:
+                code = self.function_codes[function_name] = len(self.function_names)
+                self.function_names.append(function_name)
+            columns = self.columns
+            columns['function'].append(code)
+            columns['timestamp'].append(timestamp)
+            columns['duration'].append(duration)
+            columns['cpu_time'].append(cpu_time)
+            columns['outcome'].append(outcome)
+            columns['n_args'].append(n_args)
+            columns['n_kwargs'].append(n_kwargs)
+            columns['args_len'].append(args_len)
+            if len(columns['function']) >= self.chunk_size:
+                self._write_chunk()
+
+    def flush(self):
+        '''writes the buffered rows as a chunk.'''
+        with self.lock:
+            if len(self.columns['function']):
+                self._write_chunk()
+
+    def _write_chunk(self):
+        numpy = self.numpy
+        if len(self.function_names) > self.n_function_names_written:
+            # the names are written first so that a chunk never refers to an unknown code.
+            with open(os.path.join(self.directory, FUNCTIONS_FILENAME), 'w') as f:
+                json.dump(self.function_names, f)
+            self.n_function_names_written = len(self.function_names)
+        arrays = dict((name, numpy.frombuffer(column, dtype=COLUMNS[name][1]))
+                      for name, column in self.columns.items())
+        path = os.path.join(self.directory, CHUNK_FILENAME.format(self.next_chunk))
+        with open(path + '.tmp', 'wb') as f:
+            numpy.savez(f, **arrays)
+        os.rename(path + '.tmp', path)
+        self.next_chunk += 1
+        self._reset_columns()
+
+
+# absolute path of a columnar directory -> the ColumnarExporter writing to it, see shared_exporter.
+_exporters = {}
+_exporters_lock = threading.Lock()
+
+
+def shared_exporter(directory, chunk_size=65536):
+    '''
+    returns the ColumnarExporter of a directory, created on first use and then shared by all the decorated
+    functions exporting to it: two exporters of a same directory would number their chunks and their function
+    codes independently and overwrite each other's files. The settings of the first call are the ones used.
+    '''
+    path = os.path.abspath(directory)
+    with _exporters_lock:
+        exporter = _exporters.get(path)
+        if exporter is None:
+            exporter = _exporters[path] = ColumnarExporter(path, chunk_size=chunk_size)
+        return exporter
+
+
+def read_function_names(directory):
+    '''returns the list of the function names of a columnar directory, indexed by their code.'''
+    try:
+        with open(os.path.join(directory, FUNCTIONS_FILENAME)) as f:
+            return json.load(f)
+    except (IOError, OSError):
+        return []
+
+
+def iter_chunks(directory):
+    '''
+    reads the chunks of a columnar directory one by one, to process more rows than what fits in memory.
+
+    Returns
+    -------
+    chunks: generator of dict(column name -> numpy array)
+    '''
+    numpy = _import_numpy()
+    for path in sorted(glob.glob(os.path.join(directory, 'chunk-*.npz'))):
+        with numpy.load(path) as chunk:
+            yield dict((name, chunk[name]) for name in COLUMNS)
+
+
+def load_columns(directory):
+    '''
+    reads all the chunks of a columnar directory.
+
+    Returns
+    -------
+    columns: dict(column name -> numpy array)
+        the rows of all the chunks concatenated.
+    function_names: list
+        the names of the functions, indexed by the codes of the function column.
+    '''
+    numpy = _import_numpy()
+    chunks = list(iter_chunks(directory))
+    columns = dict((name, numpy.concatenate([chunk[name] for chunk in chunks]) if chunks
+                    else numpy.empty(0, dtype=dtype))
+                   for name, (_, dtype) in COLUMNS.items())
+    return columns, read_function_names(directory)
+
+
+_timestamp_pattern = re.compile(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),(\d{3}):  #')
+_calling_pattern = re.compile(r'#calling \[(.*)\] declared inside module \[(.*)\]$')
+_success_pattern = re.compile(r'#\[.*\] ran successfully in \[(.*)\]seconds')
+_n_args_pattern = re.compile(r'#Number of positional paramters: (\d+)$')
+_n_kwargs_pattern = re.compile(r'#Number of key word paramters: (\d+)$')
+_len_pattern = re.compile(r'#\t len = (\d+)$')
+_separator = '#' + '-' * 100
+
+
+def parse_log_lines(lines):
+    '''
+    extracts the metrics of the calls logged in runtimedocs log lines.
+    The cpu time is not logged so it is NaN, and so is the duration of the failing calls.
+    The calls summarized by the coalescing or the overhead governor are not part of the output.
+    The logs only hold the name of the functions, so their rows are named module_name.function_name even for
+    methods, which the decorator names module_name.Class.method (see runtimedocs.helpers.function_key).
+
+    Returns
+    -------
+    rows: generator of tuple(function_name, timestamp, duration, cpu_time, outcome, n_args, n_kwargs, args_len)
+    '''
+    call = None
+    in_params = False
+    for line in lines:
+        line = line.rstrip('\n')
+        match = _calling_pattern.search(line)
+        if match:
+            timestamp = float('nan')
+            match_timestamp = _timestamp_pattern.match(line)
+            if match_timestamp:
+                timestamp = time.mktime(time.strptime(match_timestamp.group(1), '%Y-%m-%d %H:%M:%S')) + \
+                    int(match_timestamp.group(2)) / 1000.0
+            call = dict(function='{}.{}'.format(match.group(2), match.group(1)), timestamp=timestamp,
+                        n_args=0, n_kwargs=0, args_len=-1)
+            in_params = False
+            continue
+        if call is None:
+            continue
+
+        match = _n_args_pattern.search(line)
+        if match:
+            call['n_args'] = int(match.group(1))
+            in_params = True
+            continue
+        match = _n_kwargs_pattern.search(line)
+        if match:
+            call['n_kwargs'] = int(match.group(1))
+            continue
+        if in_params:
+            match = _len_pattern.search(line)
+            if match:
+                call['args_len'] = max(call['args_len'], 0) + int(match.group(1))
+            elif line.endswith(_separator):
+                in_params = False
+            continue
+
+        match = _success_pattern.search(line)
+        if match or '#!!!EXCEPTION!!!' in line:
+            yield (call['function'], call['timestamp'], float(match.group(1)) if match else float('nan'),
+                   float('nan'), SUCCESS if match else EXCEPTION, call['n_args'], call['n_kwargs'], call['args_len'])
+            call = None
+
+
+def convert_logs(log_paths, directory, chunk_size=65536):
+    '''
+    converts runtimedocs log files, along with their rotated segments, to a columnar directory.
+
+    Returns
+    -------
+    n_rows: int
+        number of calls converted.
+    '''
+    from runtimedocs.rotation import iter_log_lines
+
+    exporter = ColumnarExporter(directory, chunk_size=chunk_size)
+    n_rows = 0
+    for log_path in log_paths:
+        for row in parse_log_lines(iter_log_lines(log_path)):
+            exporter.record(*row)
+            n_rows += 1
+    exporter.flush()
+    return n_rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('directory', help='columnar directory to write to.')
+    parser.add_argument('logs', nargs='+', help='runtimedocs log files to convert.')
+    parser.add_argument('--chunk-size', type=int, default=65536, help='number of rows per chunk.')
+    options = parser.parse_args(argv)
+
+    n_rows = convert_logs(options.logs, options.directory, chunk_size=options.chunk_size)
+    print('{} calls converted to {}'.format(n_rows, options.directory))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
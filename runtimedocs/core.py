@@ -1,31 +1,33 @@
 import os
 import sys
+import threading
 import time
-import inspect
 from functools import wraps, partial
 import logging
-import platform
 
 try:
     from collections import ChainMap
-
-    signature_func = inspect.signature
 except ImportError:
     from chainmap import ChainMap
-    from funcsigs import signature
-
-    signature_func = lambda x: str(signature(x))
 
+# importing runtimedocs should be near-free: inspect, platform, the runtimedocs_types_parsers plugin and the modules
+# backing the optional features are only imported when they are first needed.
 from runtimedocs import helpers
-from runtimedocs.helpers import get_type
-
-HOSTNAME = platform.node()
+from runtimedocs.helpers import get_type, get_hostname, signature_func, function_key
+from runtimedocs.governor import OverheadGovernor, timer, FULL, AGGREGATE, PASSTHROUGH, MODE_NAMES
+from runtimedocs.governor import register as register_pending_aggregates
+from runtimedocs.tracebacks import TracebackDeduplicator
 
 
 def runtimedocs(force_enable_runtimedocs=False, verbosity=0, timing_info=True,
                 default_type_parser=helpers.default_type_parser, max_stringify=1000,
                 prefix_module_name_to_logger_name=True, custom_logger_name=None, extra_logger_handlers=None,
-                common_types_parsers_dict=helpers.common_types_parsers_dict, custom_types_parsers_dict=None
+                common_types_parsers_dict=helpers.common_types_parsers_dict, custom_types_parsers_dict=None,
+                overhead_budget=None, capture_store=None,
+                log_max_bytes=None, log_rotation_interval=None, log_backup_count=5, log_compression='gzip',
+                thread_buffered=False, deferred_rendering=False, render_policies=None,
+                coalesce_repeated_calls=False, traceback_dedup_interval=60, columnar_exporter=None,
+                collect_metrics=False
                 ):
     '''
     runtimedocs decorator helps you understand how your code behaves at runtime.
@@ -93,6 +95,73 @@ def runtimedocs(force_enable_runtimedocs=False, verbosity=0, timing_info=True,
         Another use of it, is if you want to parse nested lists, the default_type_parser can do that but by overriding
         the parsing function for the type: "<class'list'>" you have more control on how \ you want to parse the nested
         lists.
+    overhead_budget: float | DEFAULT = None
+        maximum accepted ratio between the time spent by runtimedocs around a call and the duration of the call itself.
+        When set, the decorator tracks that ratio for the decorated function and automatically degrades from full
+        logging to sampled logging, then to aggregate-only logging and finally to pass-through when the budget is
+        exceeded, and recovers when the overhead drops back under the budget. Each transition is logged.
+        This is useful for functions called in tight loops. See runtimedocs.governor.OverheadGovernor for details.
+        The calls still aggregated are logged at exit or with runtimedocs.governor.flush().
+        None means every call is logged in details.
+    capture_store: runtimedocs.capture.CaptureStore | str | DEFAULT = None
+        if specified, the inputs of the sampled calls are serialized and saved in this capture store so they can
+        later be replayed offline to benchmark the function, see runtimedocs.replay.
+        A string is interpreted as the path of the capture file of a CaptureStore with its default settings.
+    log_max_bytes: int | DEFAULT = None
+        if specified, the runtimedocs log files are rotated before they exceed this size.
+        This applies to the default log file and to the extra_logger_handlers given as strings. The functions
+        logging to a same file share its rotating handler, with the rotation settings of the first of them.
+    log_rotation_interval: float | DEFAULT = None
+        if specified, the runtimedocs log files are rotated every log_rotation_interval seconds.
+    log_backup_count: int | DEFAULT = 5
+        when the log files are rotated, how many rotated segments to keep per log file. 0 means keeping all of them.
+    log_compression: str | DEFAULT = 'gzip'
+        when the log files are rotated, how to compress the rotated segments: 'gzip', 'bz2', 'xz', 'zstd' or None.
+        The compression is done by a background thread so the decorated functions never pay for it.
+        Use runtimedocs.rotation.iter_log_lines to read a log file along with its rotated segments.
+    thread_buffered: bool | DEFAULT = False
+        True, means the lines logged for a call are appended as one block to a buffer owned by the calling thread
+        instead of going through the logging locks, and a collector thread writes them in batches.
+        This avoids serializing the threads of a thread pool calling decorated functions. The lines of a call are
+        written once the call is over, and at most runtimedocs.buffering.default_recorder.flush_interval seconds
+        later. Use runtimedocs.buffering.flush() to write the pending lines right away.
+    deferred_rendering: bool | DEFAULT = False
+        True, means the input parameters and returned values are not parsed on the calling thread: only a reference
+        to them and a cheap snapshot (type, len, id) are taken during the call, and the parsing is done later by the
+        collector thread of the thread buffered recording, which this flag turns on.
+        Whether a value can safely be parsed late depends on its type, see render_policies.
+    render_policies: dict | DEFAULT = None
+        when deferred_rendering is True, how to handle the values of given types, on top of
+        runtimedocs.rendering.default_render_policies. It is a dictionary with keys representing the type as str and
+        one of these policies as values:
+        'late' to parse them later, for immutable types.
+        'copy' to parse later a shallow copy of them taken during the call, for types which may be mutated after
+        the call.
+        'eager' to parse them during the call, this is the policy of the types which are not listed.
+        'summary' to only log their snapshot: type, len and id.
+    coalesce_repeated_calls: bool | DEFAULT = False
+        True, means the consecutive calls made by the same caller with the same called signature are collapsed
+        into runs: only the first call of a run is logged in details, and the run is then logged as a single line
+        with its number of calls, first/last timestamps and min/mean/max durations.
+        A call raising an exception or lasting much longer than the previous ones of its run is still logged in
+        details. Use runtimedocs.coalescing.flush() to log the runs which are still pending.
+    traceback_dedup_interval: float | DEFAULT = 60
+        exceptions are fingerprinted by their type and the code locations of their traceback. The full traceback
+        of an exception is only logged the first time its fingerprint is seen and then at most once every
+        traceback_dedup_interval seconds, the other occurrences are logged as a single line referring to it
+        along with the number of times it was seen. This keeps a failing dependency from flooding the logs.
+        None means the full traceback of every exception is logged.
+    columnar_exporter: runtimedocs.columnar.ColumnarExporter | str | DEFAULT = None
+        if specified, the metrics of every call: function, timestamp, duration, cpu time, outcome, number of
+        parameters and sum of their lengths, are appended as a row to this columnar exporter, which writes them
+        by chunks of numpy arrays for vectorized analysis. Requires numpy.
+        A string is interpreted as the directory of a ColumnarExporter with its default settings, shared by all
+        the functions exporting to that directory.
+    collect_metrics: bool | runtimedocs.metrics.MetricsRegistry | DEFAULT = False
+        if True, the number of calls, the number of exceptions raised and a histogram of the durations of the calls
+        are kept in memory, whatever the instrumentation level chosen by overhead_budget, and can be served by
+        runtimedocs.metrics.start_server in Prometheus text format and JSON while the process runs.
+        A MetricsRegistry can be given instead of True to keep them apart from the default registry.
 
     Returns
     -------
@@ -107,17 +176,59 @@ def runtimedocs(force_enable_runtimedocs=False, verbosity=0, timing_info=True,
     # if not found then search in the common types parsers provided natively by the package
     # or the runtimedocs-typesparsers plugin
     # if the type is not found there too then we use the default parser.
+    if thread_buffered or deferred_rendering:
+        from runtimedocs.buffering import default_recorder as recorder, LogBlock
+    else:
+        recorder = None
+
+    if isinstance(capture_store, str):
+        from runtimedocs.capture import CaptureStore
+        capture_store = CaptureStore(capture_store)
+
+    if isinstance(columnar_exporter, str):
+        from runtimedocs.columnar import shared_exporter
+        columnar_exporter = shared_exporter(columnar_exporter)
+    if columnar_exporter is not None:
+        from runtimedocs.columnar import args_len, cpu_timer, SUCCESS, EXCEPTION
+
+    if collect_metrics is True:
+        from runtimedocs.metrics import registry as collect_metrics
+
     types_parsers = ChainMap(custom_types_parsers_dict, common_types_parsers_dict)
 
     def parse_arg(arg):
         parse_func = types_parsers.get(get_type(arg), partial(default_type_parser, max_stringify=max_stringify))
         return parse_func(arg)
 
+    if deferred_rendering:
+        from runtimedocs import rendering
+        render_policies = ChainMap(render_policies if render_policies else {}, rendering.default_render_policies)
+
     def print_arg(arg, logger):
-        for key, val in parse_arg(arg).items():
+        parsed = None
+        if deferred_rendering:
+            policy = rendering.resolve_policy(arg, render_policies)
+            if policy == rendering.SUMMARY:
+                parsed = rendering.snapshot(arg)
+            elif policy != rendering.EAGER:
+                logger.defer(rendering.DeferredArg(arg, policy, parse_arg))
+                return
+        if parsed is None:
+            parsed = parse_arg(arg)
+        for key, val in parsed.items():
             logger.info('\t {key} = {val}'.format(key=key, val=val))
         logger.info('-' * 5)
 
+    def make_file_handler(filename):
+        if not log_max_bytes and not log_rotation_interval:
+            # delay=True so that the log file is only created when the decorated function is called.
+            return logging.FileHandler(filename, delay=True)
+        # imported here since logging.handlers is only needed when the log files are rotated.
+        from runtimedocs.rotation import shared_handler
+        # the rotating handler of a log file is shared by all the functions logging to it, see shared_handler.
+        return shared_handler(filename, max_bytes=log_max_bytes, interval=log_rotation_interval,
+                              backup_count=log_backup_count, compression=log_compression)
+
     def decorate(func):
         # if the DISABLE_RUNTIMEDOCS env var is True AND the force_enable_runtimedocs flag is False then return the
         # original non-decorated function.
@@ -145,33 +256,62 @@ def runtimedocs(force_enable_runtimedocs=False, verbosity=0, timing_info=True,
             stream_handler.setFormatter(formatter)
             logger.addHandler(stream_handler)
 
-        file_handler = logging.FileHandler('{}.runtimedocs.log'.format(logger_name))
+        file_handler = make_file_handler('{}.runtimedocs.log'.format(logger_name))
         file_handler.setLevel(logging.INFO)
         file_handler.setFormatter(formatter)
         logger.addHandler(file_handler)
 
         for handler in extra_logger_handlers:
             if isinstance(handler, str):
-                file_handler = logging.FileHandler(handler)
+                file_handler = make_file_handler(handler)
                 file_handler.setLevel(logging.INFO)
                 file_handler.setFormatter(formatter)
                 logger.addHandler(file_handler)
             else:
                 logger.addHandler(handler)
 
-        @wraps(func)
-        def wrapper(*args, **kwargs):
+        governor = OverheadGovernor(overhead_budget) if overhead_budget else None
+        if governor:
+            def log_pending_aggregates():
+                log_aggregates(logger)
+
+            register_pending_aggregates(log_pending_aggregates)
+        if traceback_dedup_interval is not None:
+            deduplicator = TracebackDeduplicator(traceback_dedup_interval)
+        else:
+            deduplicator = None
+        func_key = function_key(func)
+        metrics = collect_metrics.get(func_key) if collect_metrics else None
+
+        if coalesce_repeated_calls:
+            from runtimedocs import coalescing
+            coalescer = coalescing.CallCoalescer()
+
+            def log_pending_run():
+                log_run_summary(None, coalescer.flush())
+
+            coalescing.register(log_pending_run)
+        else:
+            coalescer = None
+
+        def called_signature(args, kwargs):
+            args_types = [get_type(el) for el in args]
+            kwargs_types = [(str(k), get_type(v)) for k, v in kwargs.items()]
+
+            return ', '.join(args_types + ['{}={}'.format(k, v) for k, v in kwargs_types])
+
+        def log_call(logger, args, kwargs, caller=None, all_args_str=None):
+            thread = threading.current_thread()
             logger.info('#' * 100)
             logger.info('calling [{}] declared inside module [{}]'.format(func.__name__, func.__module__))
-            logger.info('caller name: [{}]'.format(helpers.caller_name()))
-            logger.info('ran inside: hostname=[{}]'.format(HOSTNAME))
+            logger.info('caller name: [{}]'.format(caller if caller is not None else helpers.caller_name(skip=3)))
+            logger.info('ran inside: hostname=[{}]'.format(get_hostname()))
+            logger.info('ran on thread: name=[{}] id=[{}]'.format(thread.name, thread.ident))
             logger.info('-' * 100)
 
             # getting the signature information
-            args_types = [get_type(el) for el in args]
-            kwargs_types = [(str(k), get_type(v)) for k, v in kwargs.items()]
-
-            all_args_str = ', '.join(args_types + ['{}={}'.format(k, v) for k, v in kwargs_types])
+            if all_args_str is None:
+                all_args_str = called_signature(args, kwargs)
 
             logger.info('declared signature = {func_name}{signature}'.format(
                 func_name=func.__name__,
@@ -199,31 +339,173 @@ def runtimedocs(force_enable_runtimedocs=False, verbosity=0, timing_info=True,
 
             logger.info('-' * 100)
 
+        def log_exception(logger, e):
+            if deduplicator is None:
+                full = True
+            else:
+                full, fingerprint_id, occurrences, last_full = deduplicator.observe(type(e), sys.exc_info()[2])
+            if not full:
+                logger.error('!!!EXCEPTION!!! [{}] ran into an exception before exiting: {}: {} '
+                             '(fingerprint [{}] seen [{}] times, full traceback logged [{}]s ago)'.format(
+                    func.__name__,
+                    type(e).__name__,
+                    str(e)[:max_stringify],
+                    fingerprint_id,
+                    occurrences,
+                    round(time.time() - last_full, 1)
+                ))
+                return
+            logger.error('!!!EXCEPTION!!! [{}] ran into an exception before exiting:'.format(func.__name__))
+            logger.error('\n')
+            logger.error(e, exc_info=True)
+            if deduplicator is not None:
+                logger.error('exception fingerprint: [{}] seen [{}] times'.format(fingerprint_id, occurrences))
+
+        def log_result(logger, res, duration):
+            logger.info('[{}] ran successfully in [{}]seconds and its returned value has these specs:'.format(
+                func.__name__,
+                str(round(duration, 4))
+            )
+            )
+            if isinstance(res, tuple):
+                logger.info('returned value is a tuple and could be a multi output return statement:')
+                for i, el in enumerate(res):
+                    logger.info('\t#{}:'.format(i))
+                    print_arg(el, logger)
+            else:
+                logger.info('single output return statement:')
+                print_arg(res, logger)
+
+        def log_run_summary(log, summary):
+            if summary is None:
+                return
+            if log is None:
+                # the run is logged outside of any call, ie: by coalescing.flush()
+                log = LogBlock() if recorder else logger
+                log.info(coalescing.format_summary(func.__name__, summary))
+                if recorder:
+                    recorder.record(logger, log)
+                    recorder.flush()
+            else:
+                log.info(coalescing.format_summary(func.__name__, summary))
+
+        def log_aggregates(logger):
+            summary = governor.summary()
+            if summary:
+                logger.info('[{}] {}'.format(func.__name__, summary))
+
+        def govern(logger, level, duration, overhead, failed):
+            if level == AGGREGATE and governor.aggregate(duration, failed=failed):
+                log_aggregates(logger)
+            transition = governor.record(level, duration, overhead)
+            if transition is not None:
+                old_mode, new_mode, ratio = transition
+                # the level changes, flush what has been aggregated so far.
+                log_aggregates(logger)
+                logger.warning('runtimedocs overhead governor: [{}] switched from [{}] to [{}] mode '
+                               '(overhead/duration ratio=[{}], budget=[{}])'.format(
+                    func.__name__,
+                    MODE_NAMES[old_mode],
+                    MODE_NAMES[new_mode],
+                    round(ratio, 4),
+                    governor.budget
+                ))
+
+        def report_instrumentation_error():
+            # runtimedocs must never change the outcome of a call, so its own errors are only reported.
+            try:
+                logger.warning('runtimedocs failed to instrument a call of [{}]:'.format(func.__name__),
+                               exc_info=True)
+            except Exception:
+                pass
+
+        def record(log):
+            if recorder and log is not logger:
+                try:
+                    recorder.record(logger, log)
+                except Exception:
+                    report_instrumentation_error()
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = timer()
+            level = FULL
+            log = logger
+            repeated = export = False
+            caller = all_args_str = None
+            try:
+                level = governor.call_level() if governor else FULL
+                # the lines of the call are either logged right away or collected in a block recorded once it is over.
+                log = LogBlock() if recorder else logger
+                if level == FULL and coalescer:
+                    caller = helpers.caller_name()
+                    all_args_str = called_signature(args, kwargs)
+                    repeated, summary = coalescer.begin((caller, all_args_str))
+                    log_run_summary(log, summary)
+                    if not repeated:
+                        log_call(log, args, kwargs, caller=caller, all_args_str=all_args_str)
+                elif level == FULL:
+                    log_call(log, args, kwargs)
+                if capture_store is not None and level != PASSTHROUGH:
+                    capture_store.capture(func_key, args, kwargs)
+
+                export = columnar_exporter is not None and level != PASSTHROUGH
+                if export:
+                    started, cpu_tic = time.time(), cpu_timer()
+            except Exception:
+                report_instrumentation_error()
+
             # get details about the return values or the eventual exception raised
+            tic = timer()
             try:
-                tic = time.time()
                 res = func(*args, **kwargs)
-                tac = time.time()
             except Exception as e:
-                logger.error('!!!EXCEPTION!!! [{}] ran into an exception before exiting:'.format(func.__name__))
-                logger.error('\n')
-                logger.error(e, exc_info=True)
-                raise e
-            else:
-                logger.info('[{}] ran successfully in [{}]seconds and its returned value has these specs:'.format(
-                    func.__name__,
-                    str(round(tac - tic, 4))
-                )
-                )
-                if isinstance(res, tuple):
-                    logger.info('returned value is a tuple and could be a multi output return statement:')
-                    for i, el in enumerate(res):
-                        logger.info('\t#{}:'.format(i))
-                        print_arg(el, logger)
-                else:
-                    logger.info('single output return statement:')
-                    print_arg(res, logger)
-                return res
+                tac = timer()
+                try:
+                    if metrics:
+                        metrics.observe(tac - tic, failed=True)
+                    if export:
+                        columnar_exporter.record(func_key, started, tac - tic, cpu_timer() - cpu_tic, EXCEPTION,
+                                                 len(args), len(kwargs), args_len(args, kwargs))
+                    if level == FULL:
+                        if coalescer:
+                            deviating, summary = coalescer.end(repeated, tac - tic, failed=True)
+                            log_run_summary(log, summary)
+                            if deviating:
+                                log_call(log, args, kwargs, caller=caller, all_args_str=all_args_str)
+                        log_exception(log, e)
+                    if governor:
+                        govern(log, level, tac - tic, timer() - start - (tac - tic), failed=True)
+                except Exception:
+                    report_instrumentation_error()
+                finally:
+                    record(log)
+                raise
+
+            tac = timer()
+            try:
+                if metrics:
+                    metrics.observe(tac - tic)
+                if export:
+                    columnar_exporter.record(func_key, started, tac - tic, cpu_timer() - cpu_tic, SUCCESS,
+                                             len(args), len(kwargs), args_len(args, kwargs))
+                if level == FULL:
+                    deviating = False
+                    if coalescer:
+                        deviating, summary = coalescer.end(repeated, tac - tic)
+                        log_run_summary(log, summary)
+                        if deviating:
+                            log_call(log, args, kwargs, caller=caller, all_args_str=all_args_str)
+                            log.info('this call deviates from the previous ones by its duration.')
+                    if not repeated or deviating:
+                        log_result(log, res, tac - tic)
+                if governor:
+                    govern(log, level, tac - tic, timer() - start - (tac - tic), failed=False)
+            except Exception:
+                report_instrumentation_error()
+            finally:
+                record(log)
+            return res
 
         return wrapper
 
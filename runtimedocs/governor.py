@@ -0,0 +1,200 @@
+import atexit
+import threading
+import time
+
+# most precise clock available to measure how much time runtimedocs itself spends around a call.
+timer = getattr(time, 'perf_counter', time.time)
+
+# callbacks logging the calls still aggregated when the program exits, see register.
+_pending_aggregates_loggers = []
+
+FULL = 0
+SAMPLED = 1
+AGGREGATE = 2
+PASSTHROUGH = 3
+
+MODE_NAMES = {
+    FULL: 'full',
+    SAMPLED: 'sampled',
+    AGGREGATE: 'aggregate-only',
+    PASSTHROUGH: 'pass-through',
+}
+
+
+class OverheadGovernor(object):
+    '''
+    Keeps track, for a single decorated function, of the ratio between the overhead added by runtimedocs and the
+    duration of the wrapped call, and degrades the instrumentation level when that ratio exceeds a budget.
+
+    The instrumentation levels, from the richest to the cheapest, are:
+        - full: every call is logged in details.
+        - sampled: only one call out of `sample_every` is logged in details, the others are only aggregated.
+        - aggregate-only: calls are only counted and timed, a one-line summary is logged every `aggregate_every` calls.
+        - pass-through: the function is called directly, only its duration is measured.
+
+    The overhead of each level is tracked with an exponentially weighted moving average. A decision is taken every
+    `window` calls: the governor moves one level down when the overhead ratio of the current level is above `budget`,
+    and one level up when the estimated ratio of the richer level is below `budget * recovery_factor`.
+    While degraded, one call out of `probe_every` is logged in details to keep the estimate of the full level fresh,
+    which allows the governor to recover when the cost of logging drops or the function becomes slower.
+    A governor is shared by all the threads calling the decorated function, so its state is updated under a lock.
+
+    Parameters
+    ----------
+    budget: float
+        maximum accepted ratio overhead/duration. ie: 0.5 means runtimedocs should not add more than 50% to the
+        duration of the decorated function.
+    window: int | DEFAULT = 50
+        number of calls between two decisions.
+    sample_every: int | DEFAULT = 10
+        in sampled mode, log the details of one call out of sample_every.
+    aggregate_every: int | DEFAULT = 1000
+        in sampled and aggregate-only modes, log a summary line every aggregate_every aggregated calls.
+    probe_every: int | DEFAULT = 1000
+        in aggregate-only and pass-through modes, log the details of one call out of probe_every.
+    recovery_factor: float | DEFAULT = 0.5
+        hysteresis used to avoid oscillating between two levels.
+    smoothing: float | DEFAULT = 0.1
+        weight of the latest measure in the moving averages.
+    '''
+
+    def __init__(self, budget, window=50, sample_every=10, aggregate_every=1000, probe_every=1000,
+                 recovery_factor=0.5, smoothing=0.1):
+        self.budget = float(budget)
+        self.window = window
+        self.sample_every = sample_every
+        self.aggregate_every = aggregate_every
+        self.probe_every = probe_every
+        self.recovery_factor = recovery_factor
+        self.smoothing = smoothing
+        self.lock = threading.Lock()
+
+        self.mode = FULL
+        self.calls_in_mode = 0
+        self.calls_in_window = 0
+        self.duration = None
+        # overhead moving averages of the levels at which a call can actually be handled.
+        self.overheads = {FULL: None, AGGREGATE: None, PASSTHROUGH: None}
+        self.reset_aggregates()
+
+    def reset_aggregates(self):
+        self.n_calls = 0
+        self.n_errors = 0
+        self.total_duration = 0.0
+        self.min_duration = None
+        self.max_duration = None
+
+    def call_level(self):
+        '''returns the level at which the next call should be handled: FULL, AGGREGATE or PASSTHROUGH.'''
+        if self.mode == FULL:
+            return FULL
+        if self.mode == SAMPLED:
+            return FULL if self.calls_in_mode % self.sample_every == 0 else AGGREGATE
+        if self.calls_in_mode % self.probe_every == 0:
+            return FULL
+        return self.mode
+
+    def aggregate(self, duration, failed=False):
+        '''
+        adds a call to the aggregated statistics.
+
+        Returns
+        -------
+        flush: bool
+            True when aggregate_every calls have been aggregated and a summary should be logged.
+        '''
+        with self.lock:
+            self.n_calls += 1
+            self.n_errors += int(failed)
+            self.total_duration += duration
+            if self.min_duration is None or duration < self.min_duration:
+                self.min_duration = duration
+            if self.max_duration is None or duration > self.max_duration:
+                self.max_duration = duration
+            return self.n_calls >= self.aggregate_every
+
+    def summary(self):
+        '''returns a one-line summary of the aggregated calls and resets them.'''
+        with self.lock:
+            if not self.n_calls:
+                return None
+            msg = '{} calls ({} exceptions) aggregated: mean=[{}]s min=[{}]s max=[{}]s'.format(
+                self.n_calls,
+                self.n_errors,
+                round(self.total_duration / self.n_calls, 6),
+                round(self.min_duration, 6),
+                round(self.max_duration, 6),
+            )
+            self.reset_aggregates()
+            return msg
+
+    def _smooth(self, previous, value):
+        if previous is None:
+            return value
+        return previous + self.smoothing * (value - previous)
+
+    def cost(self, mode):
+        '''returns the estimated overhead per call of a mode, or None if it was never measured.'''
+        if mode == SAMPLED:
+            full, aggregate = self.overheads[FULL], self.overheads[AGGREGATE]
+            if full is None or aggregate is None:
+                return None
+            return (full + (self.sample_every - 1) * aggregate) / self.sample_every
+        return self.overheads[mode]
+
+    def ratio(self, mode):
+        '''returns the estimated ratio overhead/duration of a mode, or None if it was never measured.'''
+        cost = self.cost(mode)
+        if cost is None or self.duration is None:
+            return None
+        return cost / max(self.duration, 1e-9)
+
+    def record(self, level, duration, overhead):
+        '''
+        records the duration of a call and the overhead runtimedocs added to it at a given level.
+
+        Returns
+        -------
+        transition: tuple(old_mode, new_mode, ratio) | None
+            the mode transition decided after this call if any.
+        '''
+        with self.lock:
+            return self._record(level, duration, overhead)
+
+    def _record(self, level, duration, overhead):
+        self.duration = self._smooth(self.duration, duration)
+        self.overheads[level] = self._smooth(self.overheads[level], overhead)
+        self.calls_in_mode += 1
+        self.calls_in_window += 1
+        if self.calls_in_window < self.window:
+            return None
+        self.calls_in_window = 0
+
+        ratio = self.ratio(self.mode)
+        if ratio is not None and ratio > self.budget and self.mode < PASSTHROUGH:
+            return self._switch(self.mode + 1, ratio)
+
+        if self.mode > FULL:
+            richer_ratio = self.ratio(self.mode - 1)
+            if richer_ratio is not None and richer_ratio <= self.budget * self.recovery_factor:
+                return self._switch(self.mode - 1, richer_ratio)
+        return None
+
+    def _switch(self, new_mode, ratio):
+        old_mode = self.mode
+        self.mode = new_mode
+        self.calls_in_mode = 0
+        return old_mode, new_mode, ratio
+
+
+def register(log_pending_aggregates):
+    '''registers a callback logging the aggregated calls of a decorated function, called by flush and at exit.'''
+    if not _pending_aggregates_loggers:
+        atexit.register(flush)
+    _pending_aggregates_loggers.append(log_pending_aggregates)
+
+
+def flush():
+    '''logs the summaries of the calls still aggregated for all the decorated functions.'''
+    for log_pending_aggregates in list(_pending_aggregates_loggers):
+        log_pending_aggregates()
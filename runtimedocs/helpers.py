@@ -1,26 +1,86 @@
-import inspect
 from collections import OrderedDict
 
 try:
     from collections import ChainMap
-    signature_func = inspect.signature
+    from collections.abc import Mapping
 except ImportError:
     from chainmap import ChainMap
-    from funcsigs import signature
-    signature_func = lambda x: str(signature(x))
+    from collections import Mapping
 
-# try to import the runtimedocs_types_parsers plugin package to have more parsers for commonly used libraries like:
-# numpy, pandas, scipy, etc ...
-try:
-    from runtimedocs_types_parsers import extra_types_parsers_dict
-except ImportError:
-    extra_types_parsers_dict = dict()
+# inspect and platform are slow to import, so they are only imported by the helpers needing them.
+
+
+def signature_func(obj):
+    '''helper function to get the signature of a function/class.'''
+    try:
+        from inspect import signature
+    except ImportError:
+        from funcsigs import signature
+        return str(signature(obj))
+    return signature(obj)
+
+
+_hostname = []
+
+
+def get_hostname():
+    '''helper function to get the hostname of the machine running the code, resolved once on first use.'''
+    if not _hostname:
+        import platform
+        _hostname.append(platform.node())
+    return _hostname[0]
+
+
+class LazyPluginParsers(Mapping):
+    '''
+    Read-only mapping of the parsers provided by the runtimedocs_types_parsers plugin package for commonly used
+    libraries like: numpy, pandas, scipy, etc ...
+    The plugin, which in turn may import these libraries, is only imported the first time a parser is looked up.
+    An empty mapping is used if the plugin is not installed.
+    '''
+
+    def __init__(self):
+        self._parsers = None
+
+    @property
+    def parsers(self):
+        if self._parsers is None:
+            try:
+                from runtimedocs_types_parsers import extra_types_parsers_dict
+            except ImportError:
+                extra_types_parsers_dict = dict()
+            self._parsers = extra_types_parsers_dict
+        return self._parsers
+
+    def __getitem__(self, key):
+        return self.parsers[key]
+
+    def __contains__(self, key):
+        return key in self.parsers
+
+    def __iter__(self):
+        return iter(self.parsers)
+
+    def __len__(self):
+        return len(self.parsers)
+
+
+extra_types_parsers_dict = LazyPluginParsers()
 
 
 def get_type(arg):
     '''helper function the get the type of an abject as a string.'''
     return str(type(arg))
 
+def function_key(func):
+    '''
+    helper function to identify a decorated function as: module_name.qualified_name, ie: module_name.Class.method,
+    so that methods sharing a name on different classes of a same module get different keys.
+    '''
+    return '{module_name}.{func_name}'.format(module_name=func.__module__,
+                                              func_name=getattr(func, '__qualname__', func.__name__))
+
+
 def default_type_parser(arg, max_stringify=1000):
     '''
     default type parser which basically return the repr string of the object.
@@ -58,6 +118,7 @@ def function_parser(arg):
     -------
     parsed: OrderedDict('value', 'signature', 'fullargspec', 'isbuiltin')
     '''
+    import inspect
     parsed = OrderedDict(type=get_type(arg))
     parsed['name'] = arg.__name__
     parsed['signature'] = str(signature_func(arg))
@@ -80,6 +141,7 @@ def class_parser(arg):
     -------
     parsed: OrderedDict('value', 'signature', 'fullargspec', 'isbuiltin', 'inheritance_tree)
     '''
+    import inspect
     parsed = function_parser(arg)
     parsed['inheritance_tree'] = inspect.getmro(arg)
     return parsed
@@ -96,6 +158,7 @@ def caller_name(skip=2):
        copied from here:
        https://stackoverflow.com/questions/2654113/python-how-to-get-the-callers-method-name-in-the-called-method
     """
+    import inspect
     stack = inspect.stack()
     start = 0 + skip
     if len(stack) < start + 1:
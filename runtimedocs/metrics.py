@@ -0,0 +1,240 @@
+import json
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+
+# upper bounds, in seconds, of the buckets of the latency histograms. The last bucket, +Inf, is implicit.
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                   5.0, 10.0)
+
+
+class FunctionMetrics(object):
+    '''
+    In-memory counters and latency histogram of a decorated function.
+
+    Every thread updates its own shard of the counters, so recording a call never takes a lock once the thread has
+    registered its shard, and reading the metrics never blocks the decorated calls. The shards of the threads
+    which are over are folded into a retired total when the metrics are read, so a server running each request
+    on a new thread does not accumulate shards.
+    '''
+
+    def __init__(self, name, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.buckets = buckets
+        self._local = threading.local()
+        # list of (thread, shard), the lock is only taken when a thread records its first call and when reading.
+        self._shards = []
+        self._retired = self._new_shard()
+        self._shards_lock = threading.Lock()
+
+    def _new_shard(self):
+        # [calls, errors, sum of the durations, count of each bucket..., count of the +Inf bucket]
+        return [0, 0, 0.0] + [0] * (len(self.buckets) + 1)
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = self._new_shard()
+            with self._shards_lock:
+                self._shards.append((threading.current_thread(), shard))
+            return shard
+
+    def observe(self, duration, failed=False):
+        '''records a call.'''
+        shard = self._shard()
+        shard[0] += 1
+        if failed:
+            shard[1] += 1
+        shard[2] += duration
+        shard[3 + bisect_left(self.buckets, duration)] += 1
+
+    def snapshot(self):
+        '''
+        sums the shards of all threads.
+
+        Returns
+        -------
+        metrics: OrderedDict('calls', 'errors', 'error_rate', 'duration_sum', 'mean_duration', 'buckets')
+            buckets being a list of tuple(upper bound, cumulative count), the last upper bound being +Inf.
+        '''
+        with self._shards_lock:
+            alive = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    alive.append((thread, shard))
+                else:
+                    # the thread is over so its shard does not change anymore.
+                    for i, value in enumerate(shard):
+                        self._retired[i] += value
+            self._shards = alive
+            totals = list(self._retired)
+        for thread, shard in alive:
+            for i, value in enumerate(list(shard)):
+                totals[i] += value
+
+        calls, errors, duration_sum = totals[:3]
+        cumulative = 0
+        buckets = []
+        for upper_bound, count in zip(self.buckets + (float('inf'),), totals[3:]):
+            cumulative += count
+            buckets.append((upper_bound, cumulative))
+
+        metrics = OrderedDict(calls=calls)
+        metrics['errors'] = errors
+        metrics['error_rate'] = float(errors) / calls if calls else 0.0
+        metrics['duration_sum'] = duration_sum
+        metrics['mean_duration'] = duration_sum / calls if calls else 0.0
+        metrics['buckets'] = buckets
+        return metrics
+
+
+def _format_bound(upper_bound):
+    return '+Inf' if upper_bound == float('inf') else repr(float(upper_bound))
+
+
+def _escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsRegistry(object):
+    '''Metrics of all the decorated functions collecting them, rendered in Prometheus text format or JSON.'''
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.functions = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, name):
+        '''returns the FunctionMetrics of a function, created on first use.'''
+        with self.lock:
+            if name not in self.functions:
+                self.functions[name] = FunctionMetrics(name, buckets=self.buckets)
+            return self.functions[name]
+
+    def snapshot(self):
+        '''returns an OrderedDict of function name -> FunctionMetrics.snapshot()'''
+        with self.lock:
+            functions = list(self.functions.values())
+        return OrderedDict((metrics.name, metrics.snapshot()) for metrics in functions)
+
+    def render_prometheus(self):
+        snapshot = self.snapshot()
+        lines = [
+            '# HELP runtimedocs_calls_total Number of calls of the decorated function.',
+            '# TYPE runtimedocs_calls_total counter',
+        ]
+        for name, metrics in snapshot.items():
+            lines.append('runtimedocs_calls_total{{function="{}"}} {}'.format(_escape_label(name), metrics['calls']))
+        lines += [
+            '# HELP runtimedocs_errors_total Number of calls of the decorated function which raised an exception.',
+            '# TYPE runtimedocs_errors_total counter',
+        ]
+        for name, metrics in snapshot.items():
+            lines.append('runtimedocs_errors_total{{function="{}"}} {}'.format(_escape_label(name), metrics['errors']))
+        lines += [
+            '# HELP runtimedocs_call_duration_seconds Duration of the calls of the decorated function.',
+            '# TYPE runtimedocs_call_duration_seconds histogram',
+        ]
+        for name, metrics in snapshot.items():
+            label = _escape_label(name)
+            for upper_bound, count in metrics['buckets']:
+                lines.append('runtimedocs_call_duration_seconds_bucket{{function="{}",le="{}"}} {}'.format(
+                    label, _format_bound(upper_bound), count))
+            lines.append('runtimedocs_call_duration_seconds_sum{{function="{}"}} {}'.format(
+                label, repr(metrics['duration_sum'])))
+            lines.append('runtimedocs_call_duration_seconds_count{{function="{}"}} {}'.format(label, metrics['calls']))
+        return '\n'.join(lines) + '\n'
+
+    def render_json(self):
+        snapshot = self.snapshot()
+        for metrics in snapshot.values():
+            metrics['buckets'] = OrderedDict((_format_bound(upper_bound), count)
+                                             for upper_bound, count in metrics['buckets'])
+        return json.dumps(OrderedDict(functions=snapshot))
+
+
+registry = MetricsRegistry()
+
+
+def _make_handler(registry):
+    try:
+        from http.server import BaseHTTPRequestHandler
+    except ImportError:
+        from BaseHTTPServer import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split('?')[0]
+            if path in ('/', '/metrics'):
+                body, content_type = registry.render_prometheus(), 'text/plain; version=0.0.4; charset=utf-8'
+            elif path in ('/json', '/metrics.json'):
+                body, content_type = registry.render_json(), 'application/json'
+            else:
+                self.send_error(404)
+                return
+            body = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # scraping should not write anything, neither to stderr nor to the runtimedocs logs.
+            pass
+
+    return MetricsHandler
+
+
+def start_server(port=9464, host='127.0.0.1', unix_socket=None, registry=registry):
+    '''
+    serves the metrics collected by the decorated functions (see the collect_metrics parameter of runtimedocs)
+    from a daemon thread:
+        - /metrics in Prometheus text format.
+        - /metrics.json in JSON.
+    The metrics are computed from the in-memory counters, so the log files are never read.
+
+    Parameters
+    ----------
+    port: int | DEFAULT = 9464
+        local port to listen on, 0 picks a free one.
+    host: str | DEFAULT = '127.0.0.1'
+        address to listen on.
+    unix_socket: str | DEFAULT = None
+        if specified, path of a UNIX socket to listen on instead of host and port.
+    registry: MetricsRegistry | DEFAULT = runtimedocs.metrics.registry
+
+    Returns
+    -------
+    server: the running server, its server_address attribute tells where it listens and its shutdown method
+        stops it.
+    '''
+    try:
+        import socketserver
+        from http.server import HTTPServer
+    except ImportError:
+        import SocketServer as socketserver
+        from BaseHTTPServer import HTTPServer
+
+    handler = _make_handler(registry)
+    if unix_socket is not None:
+        class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+            def get_request(self):
+                request, _ = socketserver.UnixStreamServer.get_request(self)
+                # BaseHTTPRequestHandler expects a (host, port) client address.
+                return request, ('local', 0)
+
+        server = UnixHTTPServer(unix_socket, handler)
+    else:
+        class ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+            daemon_threads = True
+
+        server = ThreadingHTTPServer((host, port), handler)
+
+    thread = threading.Thread(target=server.serve_forever, name='runtimedocs-metrics-server')
+    thread.daemon = True
+    thread.start()
+    return server
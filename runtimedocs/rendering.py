@@ -0,0 +1,140 @@
+import copy
+from collections import OrderedDict, deque
+from itertools import chain
+
+from runtimedocs.helpers import get_type
+
+# render policies, ie: how to handle a value whose parsing is deferred to the collector thread.
+# late: the value cannot change, keep a reference to it and parse it later.
+LATE = 'late'
+# copy: the value may be mutated after the call, keep a shallow copy of it and parse the copy later.
+# only used for containers whose items can all be rendered late, see resolve_policy.
+COPY = 'copy'
+# eager: parse the value right away, on the calling thread, like when the rendering is not deferred.
+EAGER = 'eager'
+# summary: only log the cheap snapshot of the value: type, len and id.
+SUMMARY = 'summary'
+
+default_render_policies = {
+    "<class 'NoneType'>": LATE,
+    "<class 'bool'>": LATE,
+    "<class 'int'>": LATE,
+    "<class 'float'>": LATE,
+    "<class 'complex'>": LATE,
+    "<class 'str'>": LATE,
+    "<class 'bytes'>": LATE,
+    "<class 'range'>": LATE,
+    "<class 'frozenset'>": LATE,
+    "<class 'decimal.Decimal'>": LATE,
+    "<class 'fractions.Fraction'>": LATE,
+    "<class 'type'>": LATE,
+    "<class 'function'>": LATE,
+    "<class 'builtin_function_or_method'>": LATE,
+    "<class 'list'>": COPY,
+    "<class 'dict'>": COPY,
+    "<class 'set'>": COPY,
+    "<class 'bytearray'>": COPY,
+    "<class 'collections.OrderedDict'>": COPY,
+    "<class 'collections.defaultdict'>": COPY,
+    "<class 'collections.deque'>": COPY,
+}
+
+
+# containers with more items than this are rendered eagerly rather than checked item by item, so that choosing a
+# policy never costs more than rendering.
+max_checked_items = 1000
+
+
+def _all_late(items, policies, default_policy):
+    # the policy of a type is only resolved once per container, except for tuples which depend on their items.
+    late_types = set()
+    for el in items:
+        el_type = type(el)
+        if el_type in late_types:
+            continue
+        if resolve_policy(el, policies, default_policy) != LATE:
+            return False
+        if el_type is not tuple:
+            late_types.add(el_type)
+    return True
+
+
+def resolve_policy(arg, policies, default_policy=EAGER):
+    '''
+    helper function to get the render policy of a value.
+
+    A tuple is rendered late if all its items can be rendered late, and eagerly otherwise since copying it would
+    not protect its mutable items. Likewise a list, dict, set or deque is only copied if all its items (keys and
+    values for a dict) can be rendered late, since a shallow copy shares its mutable items with the original,
+    and is rendered eagerly otherwise. Tuples and containers of more than max_checked_items items are rendered
+    eagerly without looking at their items.
+
+    Parameters
+    ----------
+    arg: value to render
+    policies: mapping of types as str to render policies, see default_render_policies.
+    default_policy: render policy of the types missing from policies.
+
+    Returns
+    -------
+    policy: one of LATE, COPY, EAGER, SUMMARY
+    '''
+    arg_type = get_type(arg)
+    if arg_type in policies:
+        policy = policies[arg_type]
+        if policy == COPY and isinstance(arg, (list, dict, set, deque)):
+            if len(arg) > max_checked_items:
+                return EAGER
+            items = chain(arg.keys(), arg.values()) if isinstance(arg, dict) else arg
+            if not _all_late(items, policies, default_policy):
+                return EAGER
+        return policy
+    if arg_type == "<class 'tuple'>":
+        if len(arg) > max_checked_items:
+            return EAGER
+        return LATE if _all_late(arg, policies, default_policy) else EAGER
+    return default_policy
+
+
+def snapshot(arg):
+    '''cheap description of a value taken on the calling thread: its type, len when relevant, and id.'''
+    parsed = OrderedDict(type=get_type(arg))
+    try:
+        parsed['len'] = len(arg)
+    except Exception:
+        pass
+    parsed['id'] = id(arg)
+    return parsed
+
+
+class DeferredArg(object):
+    '''
+    Reference to a value, or to a shallow copy of it, along with its snapshot. The collector thread calls it
+    to get the lines describing the value, parse_arg being the parsing function of the decorator.
+    '''
+
+    def __init__(self, arg, policy, parse_arg):
+        self.snapshot = snapshot(arg)
+        self.parse_arg = parse_arg
+        self.lines = None
+        self.arg = arg
+        if policy == COPY:
+            try:
+                self.arg = copy.copy(arg)
+            except Exception:
+                # a value that cannot be copied is rendered right away.
+                self.lines = self.render(arg)
+
+    def render(self, arg):
+        try:
+            parsed = self.parse_arg(arg)
+        except Exception as e:
+            parsed = OrderedDict(self.snapshot)
+            parsed['rendering_error'] = repr(e)
+        return ['\t {key} = {val}'.format(key=key, val=val) for key, val in parsed.items()] + ['-' * 5]
+
+    def __call__(self):
+        if self.lines is None:
+            self.lines = self.render(self.arg)
+            self.arg = None
+        return self.lines
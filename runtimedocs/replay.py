@@ -0,0 +1,150 @@
+'''
+Replay the inputs captured by runtimedocs (see runtimedocs.capture.CaptureStore) against one or several versions of
+a function and report their latency distributions.
+
+usage: python -m runtimedocs.replay captures.bin my_package.my_module:my_func my_package.my_module:my_func_v2 \
+    -k my_package.my_module.my_func -n 100
+'''
+import argparse
+import importlib
+import sys
+from collections import OrderedDict
+
+from runtimedocs.capture import iter_records, deserialize_inputs
+from runtimedocs.governor import timer
+from runtimedocs.helpers import function_key
+
+
+def percentile(sorted_values, q):
+    '''nearest-rank percentile of an already sorted list, q being in [0, 100].'''
+    if not sorted_values:
+        return None
+    rank = int(round(q / 100.0 * (len(sorted_values) - 1)))
+    return sorted_values[rank]
+
+
+def latency_stats(durations):
+    '''
+    summarizes a list of durations.
+
+    Returns
+    -------
+    stats: OrderedDict('calls', 'min', 'mean', 'p50', 'p90', 'p99', 'max')
+    '''
+    durations = sorted(durations)
+    stats = OrderedDict(calls=len(durations))
+    if durations:
+        stats['min'] = durations[0]
+        stats['mean'] = sum(durations) / len(durations)
+        stats['p50'] = percentile(durations, 50)
+        stats['p90'] = percentile(durations, 90)
+        stats['p99'] = percentile(durations, 99)
+        stats['max'] = durations[-1]
+    return stats
+
+
+def resolve_target(target):
+    '''imports a function given as "package.module:attribute.path".'''
+    module_name, _, attr_path = target.partition(':')
+    obj = importlib.import_module(module_name)
+    for attr in attr_path.split('.'):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def replay(func, path, key=None, repeat=100, warmup=1, unwrap=True):
+    '''
+    re-invokes a function with the inputs captured in a capture file.
+
+    The captured inputs are deserialized again before every call, outside of the timed section, so that functions
+    mutating their arguments are always replayed with the original inputs.
+
+    Parameters
+    ----------
+    func: function to replay the captured inputs against.
+    path: path of the capture file.
+    key: str | DEFAULT = None
+        key of the function whose inputs should be replayed, by default the key of func.
+        Use it to replay the inputs captured for a function against another version of it.
+    repeat: int | DEFAULT = 100
+        number of timed calls per captured input.
+    warmup: int | DEFAULT = 1
+        number of untimed calls per captured input done before the timed ones.
+    unwrap: bool | DEFAULT = True
+        if True and func is decorated with runtimedocs, replay the original non-decorated function.
+
+    Returns
+    -------
+    report: OrderedDict('inputs', 'errors', 'calls', 'min', 'mean', 'p50', 'p90', 'p99', 'max')
+        durations are in seconds.
+
+    Raises
+    ------
+    ValueError
+        if no input was captured for key, so that comparing versions never silently measures nothing.
+    '''
+    if unwrap:
+        func = getattr(func, '__wrapped__', func)
+    key = key if key else function_key(func)
+
+    durations = []
+    n_inputs = 0
+    n_errors = 0
+    for func_key, digest, payload in iter_records(path):
+        if func_key != key:
+            continue
+        n_inputs += 1
+        for i in range(warmup + repeat):
+            args, kwargs = deserialize_inputs(payload)
+            tic = timer()
+            try:
+                func(*args, **kwargs)
+            except Exception:
+                n_errors += 1
+                continue
+            tac = timer()
+            if i >= warmup:
+                durations.append(tac - tic)
+
+    if not n_inputs:
+        raise ValueError('no input captured for the key [{}] in [{}], use the key argument to replay the inputs '
+                         'of another function.'.format(key, path))
+
+    report = OrderedDict(inputs=n_inputs, errors=n_errors)
+    report.update(latency_stats(durations))
+    return report
+
+
+def format_report(name, report):
+    lines = ['[{}] replayed {} captured inputs: {} timed calls, {} exceptions'.format(
+        name, report['inputs'], report['calls'], report['errors'])]
+    if report['calls']:
+        lines.append('\t' + ' '.join('{}={:.6f}s'.format(stat, report[stat])
+                                     for stat in ('min', 'mean', 'p50', 'p90', 'p99', 'max')))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('captures', help='path of the capture file.')
+    parser.add_argument('targets', nargs='+', help='functions to replay, as "package.module:function".')
+    parser.add_argument('-n', '--repeat', type=int, default=100, help='number of timed calls per captured input.')
+    parser.add_argument('-w', '--warmup', type=int, default=1, help='number of untimed calls per captured input.')
+    parser.add_argument('-k', '--key', default=None,
+                        help='key of the captured function, by default the key of each target.')
+    parser.add_argument('--decorated', action='store_true',
+                        help='replay the runtimedocs decorated function instead of the original one.')
+    options = parser.parse_args(argv)
+
+    for target in options.targets:
+        try:
+            report = replay(resolve_target(target), options.captures, key=options.key, repeat=options.repeat,
+                            warmup=options.warmup, unwrap=not options.decorated)
+        except ValueError as e:
+            parser.error('[{}] {}'.format(target, e))
+        print(format_report(target, report))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
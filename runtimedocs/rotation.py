@@ -0,0 +1,266 @@
+import atexit
+import io
+import os
+import re
+import shutil
+import threading
+import time
+import logging.handlers
+from collections import OrderedDict
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+
+def _open_gzip(path, mode):
+    import gzip
+    return gzip.open(path, mode)
+
+
+def _open_bz2(path, mode):
+    import bz2
+    return bz2.BZ2File(path, mode)
+
+
+def _open_xz(path, mode):
+    import lzma
+    return lzma.open(path, mode)
+
+
+def _open_zstd(path, mode):
+    import zstandard
+    return zstandard.open(path, mode)
+
+
+# compression name -> (extension of the compressed segments, function opening a compressed file in binary mode)
+compressions = {
+    'gzip': ('.gz', _open_gzip),
+    'bz2': ('.bz2', _open_bz2),
+    'xz': ('.xz', _open_xz),
+    'zstd': ('.zst', _open_zstd),
+}
+openers_by_extension = dict(compressions.values())
+
+
+def segment_pattern(base_filename):
+    '''returns the regex matching the rotated segments of a log file, the group being their timestamp.'''
+    return re.compile(re.escape(os.path.basename(base_filename)) + r'\.(\d{8}-\d{6}-\d{6})(\.\w+)?$')
+
+
+def list_segments(base_filename):
+    '''
+    lists the rotated segments of a log file, compressed or not, from the oldest to the most recent.
+    The log file currently written to is not part of the list.
+    '''
+    directory = os.path.dirname(os.path.abspath(base_filename))
+    pattern = segment_pattern(base_filename)
+    segments = []
+    for name in os.listdir(directory):
+        match = pattern.match(name)
+        if match:
+            # an uncompressed segment and its compressed version can briefly coexist while being compressed.
+            segments.append((match.group(1), match.group(2) is None, os.path.join(directory, name)))
+    segments.sort()
+    # keep a single path per timestamp, the compressed one is sorted first.
+    deduplicated = OrderedDict()
+    for stamp, uncompressed, path in segments:
+        deduplicated.setdefault(stamp, path)
+    return list(deduplicated.values())
+
+
+def open_segment(path, encoding='utf-8'):
+    '''opens a log file or a rotated segment for reading as text, decompressing it transparently if needed.'''
+    opener = openers_by_extension.get(os.path.splitext(path)[1])
+    if opener is None:
+        return io.open(path, encoding=encoding)
+    return io.TextIOWrapper(opener(path, 'rb'), encoding=encoding)
+
+
+def iter_log_lines(base_filename, encoding='utf-8'):
+    '''
+    reads the lines of a log file, starting with its rotated segments, from the oldest to the most recent.
+
+    Parameters
+    ----------
+    base_filename: path of the log file, ie: my_module.my_func.runtimedocs.log
+    encoding: encoding of the log file.
+
+    Returns
+    -------
+    lines: generator of str
+    '''
+    paths = list_segments(base_filename)
+    if os.path.exists(base_filename):
+        paths.append(base_filename)
+    for path in paths:
+        try:
+            f = open_segment(path, encoding=encoding)
+        except (IOError, OSError):
+            # the segment got compressed since it was listed.
+            compressed = [path + extension for extension in openers_by_extension if os.path.exists(path + extension)]
+            if not compressed:
+                continue
+            f = open_segment(compressed[0], encoding=encoding)
+        with f:
+            for line in f:
+                yield line
+
+
+def prune_segments(base_filename, backup_count):
+    '''deletes the oldest rotated segments of a log file so that at most backup_count of them are kept.'''
+    segments = list_segments(base_filename)
+    for path in segments[:max(len(segments) - backup_count, 0)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def compress_segment(path, compression):
+    '''compresses a rotated segment and removes the uncompressed one, returns the path of the compressed segment.'''
+    extension, opener = compressions[compression]
+    compressed_path = path + extension
+    tmp_path = compressed_path + '.tmp'
+    with open(path, 'rb') as src:
+        dst = opener(tmp_path, 'wb')
+        try:
+            shutil.copyfileobj(src, dst)
+        finally:
+            dst.close()
+    os.rename(tmp_path, compressed_path)
+    os.remove(path)
+    return compressed_path
+
+
+class BackgroundCompressor(object):
+    '''
+    Daemon thread compressing and pruning rotated segments so that the threads logging never pay for it.
+    Segments still waiting to be compressed when the program exits are handled by an atexit hook.
+    '''
+
+    def __init__(self):
+        self.tasks = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def submit(self, path, compression, base_filename, backup_count):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='runtimedocs-log-compressor')
+                self.thread.daemon = True
+                self.thread.start()
+                atexit.register(self.join)
+        self.tasks.put((path, compression, base_filename, backup_count))
+
+    def run(self):
+        while True:
+            path, compression, base_filename, backup_count = self.tasks.get()
+            try:
+                if compression:
+                    compress_segment(path, compression)
+                if backup_count:
+                    prune_segments(base_filename, backup_count)
+            except Exception:
+                # a failing compression must not kill the thread, the segment simply stays uncompressed.
+                pass
+            finally:
+                self.tasks.task_done()
+
+    def join(self):
+        '''blocks until all the submitted segments are compressed.'''
+        self.tasks.join()
+
+
+compressor = BackgroundCompressor()
+
+
+class RotatingCompressedFileHandler(logging.handlers.BaseRotatingHandler):
+    '''
+    File handler rotating its log file when it reaches a given size and/or age.
+
+    On rollover the log file is renamed to a segment: log_file.YYYYmmdd-HHMMSS-ffffff, the logging resumes in a
+    new log file and the segment is compressed in the background by a daemon thread, which also deletes the oldest
+    segments beyond backup_count. Use iter_log_lines to read a log file along with all its segments.
+
+    Parameters
+    ----------
+    filename: path of the log file.
+    max_bytes: int | DEFAULT = None
+        rotate the log file before it exceeds this size. None or 0 means no size based rotation.
+    interval: float | DEFAULT = None
+        rotate the log file every interval seconds. None or 0 means no time based rotation.
+    backup_count: int | DEFAULT = 5
+        number of rotated segments to keep. None or 0 means keeping all of them.
+    compression: str | DEFAULT = 'gzip'
+        how to compress the rotated segments: one of 'gzip', 'bz2', 'xz', 'zstd' (requires the zstandard package)
+        or None to keep them uncompressed.
+    encoding: encoding of the log file.
+    '''
+
+    def __init__(self, filename, max_bytes=None, interval=None, backup_count=5, compression='gzip', encoding=None):
+        if compression and compression not in compressions:
+            raise ValueError('unknown compression [{}], expected one of: {}'.format(
+                compression, ', '.join(sorted(compressions))))
+        logging.handlers.BaseRotatingHandler.__init__(self, filename, 'a', encoding=encoding, delay=True)
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.backup_count = backup_count
+        self.compression = compression
+        self.rollover_at = time.time() + interval if interval else None
+
+    def shouldRollover(self, record):
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            return True
+        if self.max_bytes:
+            if self.stream is None:
+                self.stream = self._open()
+            msg = '{}\n'.format(self.format(record))
+            self.stream.seek(0, 2)
+            if self.stream.tell() and self.stream.tell() + len(msg) >= self.max_bytes:
+                return True
+        return False
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        if self.interval:
+            self.rollover_at = time.time() + self.interval
+        if not os.path.exists(self.baseFilename) or not os.path.getsize(self.baseFilename):
+            return
+
+        while True:
+            now = time.time()
+            segment = '{}.{}-{:06d}'.format(self.baseFilename, time.strftime('%Y%m%d-%H%M%S', time.localtime(now)),
+                                            int(now % 1 * 1e6))
+            if not os.path.exists(segment):
+                break
+        os.rename(self.baseFilename, segment)
+        if self.compression or self.backup_count:
+            compressor.submit(segment, self.compression, self.baseFilename, self.backup_count)
+
+
+# absolute path of a log file -> the RotatingCompressedFileHandler writing to it, see shared_handler.
+_handlers = {}
+_handlers_lock = threading.Lock()
+
+
+def shared_handler(filename, max_bytes=None, interval=None, backup_count=5, compression='gzip'):
+    '''
+    returns the RotatingCompressedFileHandler of a log file, created on first use and then shared by all the
+    decorated functions logging to it: two handlers rotating the same file would each keep writing to a segment
+    renamed by the other, and lose its lines. The settings of the first call are the ones used.
+
+    Parameters
+    ----------
+    see RotatingCompressedFileHandler.
+    '''
+    path = os.path.abspath(filename)
+    with _handlers_lock:
+        handler = _handlers.get(path)
+        if handler is None:
+            handler = _handlers[path] = RotatingCompressedFileHandler(
+                path, max_bytes=max_bytes, interval=interval, backup_count=backup_count, compression=compression)
+        return handler
@@ -0,0 +1,80 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+def fingerprint(exc_type, tb):
+    '''
+    helper function to identify an exception by its type and the code locations of its traceback,
+    without formatting the traceback.
+
+    Returns
+    -------
+    fingerprint: tuple('module.ExceptionType', tuple of (filename, line number, function name))
+    '''
+    locations = []
+    while tb is not None:
+        code = tb.tb_frame.f_code
+        locations.append((code.co_filename, tb.tb_lineno, code.co_name))
+        tb = tb.tb_next
+    return '{}.{}'.format(exc_type.__module__, exc_type.__name__), tuple(locations)
+
+
+def short_id(fingerprint):
+    '''short hexadecimal id of a fingerprint, used to refer to it in the logs.'''
+    import zlib
+
+    return '{:08x}'.format(zlib.crc32(repr(fingerprint).encode('utf-8')) & 0xffffffff)
+
+
+class TracebackDeduplicator(object):
+    '''
+    Decides, for each exception raised by a decorated function, whether its full traceback should be logged.
+
+    The full traceback is only logged the first time a fingerprint (see fingerprint) is seen and then at most once
+    every interval seconds; the other occurrences should be logged as a compact reference to it.
+
+    Parameters
+    ----------
+    interval: float | DEFAULT = 60.0
+        minimum number of seconds between two full tracebacks of a same fingerprint.
+    max_fingerprints: int | DEFAULT = 10000
+        number of fingerprints remembered, the least recently seen are forgotten first.
+    '''
+
+    def __init__(self, interval=60.0, max_fingerprints=10000):
+        self.interval = interval
+        self.max_fingerprints = max_fingerprints
+        self.lock = threading.Lock()
+        # fingerprint -> [short id, occurrences, time of the last full traceback]
+        self.seen = OrderedDict()
+
+    def observe(self, exc_type, tb):
+        '''
+        records an occurrence of an exception.
+
+        Returns
+        -------
+        full: bool
+            True if the full traceback should be logged.
+        fingerprint_id: str
+            short id of the fingerprint of the exception.
+        occurrences: int
+            number of times the fingerprint was seen, including this one.
+        last_full: float
+            time at which the full traceback was last logged.
+        '''
+        key = fingerprint(exc_type, tb)
+        now = time.time()
+        with self.lock:
+            entry = self.seen.pop(key, None)
+            if entry is None:
+                entry = [short_id(key), 0, None]
+                if len(self.seen) >= self.max_fingerprints:
+                    self.seen.popitem(last=False)
+            self.seen[key] = entry
+            entry[1] += 1
+            full = entry[2] is None or now - entry[2] >= self.interval
+            if full:
+                entry[2] = now
+            return full, entry[0], entry[1], entry[2]
@@ -64,6 +64,9 @@ setup(
     packages=['runtimedocs'],
     include_package_data=True,
     install_requires=reqs,
+    entry_points={
+        'console_scripts': ['runtimedocs-replay=runtimedocs.replay:main'],
+    },
     classifiers=classifiers
 )
 
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import threading
+
+import pytest
+
+from .context import mock, runtimedocs
+from runtimedocs import buffering
+
+
+@pytest.fixture(scope='function')
+def logger():
+    logger = logging.getLogger('test_buffering')
+    logger.setLevel(logging.INFO)
+    logger.handle = mock.Mock()
+    return logger
+
+
+def test_log_block_captures_exc_info():
+    block = buffering.LogBlock()
+    block.info('foo')
+    try:
+        raise ValueError('bar')
+    except ValueError:
+        block.error('bar', exc_info=True)
+
+    (info_level, info_msg, info_exc_info, _), (error_level, error_msg, error_exc_info, _) = block.entries
+    assert (info_level, info_msg, info_exc_info) == (logging.INFO, 'foo', None)
+    assert (error_level, error_msg) == (logging.ERROR, 'bar')
+    assert error_exc_info[0] is ValueError
+
+
+def test_recorder_keeps_blocks_contiguous_and_thread_info(logger):
+    recorder = buffering.ThreadBufferedRecorder(flush_interval=60)
+
+    def record_calls(call_id):
+        for i in range(50):
+            block = buffering.LogBlock()
+            block.info('{} start'.format(call_id))
+            block.info('{} end'.format(call_id))
+            recorder.record(logger, block)
+
+    threads = [threading.Thread(target=record_calls, args=(i,), name='worker-{}'.format(i)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    recorder.flush()
+
+    records = [args[0] for args, _ in logger.handle.call_args_list]
+    assert len(records) == 4 * 50 * 2
+    for start, end in zip(records[::2], records[1::2]):
+        call_id = start.msg.split()[0]
+        assert (start.msg, end.msg) == ('{} start'.format(call_id), '{} end'.format(call_id))
+        assert start.threadName == end.threadName == 'worker-{}'.format(call_id)
+        assert start.created <= end.created
+    # the buffers of the finished threads are released once drained.
+    assert recorder._buffers == []
+
+
+def test_thread_buffered_decorator(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+
+    @runtimedocs.core.runtimedocs(custom_logger_name='test_thread_buffered', thread_buffered=True)
+    def myadd(a, b):
+        return a + b
+
+    assert myadd(1, 2) == 3
+    with pytest.raises(TypeError):
+        myadd(1, 'a')
+    buffering.flush()
+
+    content = tmpdir.join('test_thread_buffered.runtimedocs.log').read()
+    assert content.count('calling [myadd]') == 2
+    assert 'ran on thread: name=[MainThread]' in content
+    assert 'Traceback (most recent call last)' in content
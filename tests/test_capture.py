@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+import threading
+
+import pytest
+
+from .context import mock, builtin_str, runtimedocs
+from .fixtures import func
+from runtimedocs import capture
+
+
+@pytest.fixture(scope='function')
+def capture_path(tmpdir):
+    return str(tmpdir.join('inputs.capture'))
+
+
+def test_capture_store_roundtrip(capture_path):
+    store = capture.CaptureStore(capture_path, sample_rate=1)
+
+    assert store.capture('mod.f', (1, [2, 3]), {'b': 'foo'})
+    assert store.capture('mod.g', ('bar',), {})
+    store.close()
+
+    assert list(capture.iter_captures(capture_path)) == [('mod.f', (1, [2, 3]), {'b': 'foo'}),
+                                                         ('mod.g', ('bar',), {})]
+    assert list(capture.iter_captures(capture_path, key='mod.g')) == [('mod.g', ('bar',), {})]
+
+
+def test_capture_store_deduplicates_across_sessions(capture_path):
+    store = capture.CaptureStore(capture_path, sample_rate=1)
+    assert store.capture('mod.f', (1,), {})
+    assert not store.capture('mod.f', (1,), {})
+    store.close()
+
+    reopened_store = capture.CaptureStore(capture_path, sample_rate=1)
+    assert not reopened_store.capture('mod.f', (1,), {})
+    # same inputs for another function are not a duplicate.
+    assert reopened_store.capture('mod.g', (1,), {})
+    reopened_store.close()
+
+    assert store.stats['duplicated'] == 1
+    assert len(list(capture.iter_captures(capture_path))) == 2
+
+
+def test_capture_store_skips_large_and_unserializable_inputs(capture_path):
+    store = capture.CaptureStore(capture_path, sample_rate=1, max_bytes=100)
+
+    assert not store.capture('mod.f', ('a' * 1000,), {})
+    assert not store.capture('mod.f', (threading.Lock(),), {})
+
+    assert store.stats['too_large'] == 1
+    assert store.stats['unserializable'] == 1
+    assert store.stats['captured'] == 0
+
+
+@pytest.mark.parametrize('sample_rate,expected_captured', [(0, 0), (1, 3)])
+def test_capture_store_sampling(capture_path, sample_rate, expected_captured):
+    store = capture.CaptureStore(capture_path, sample_rate=sample_rate)
+
+    for i in range(3):
+        store.capture('mod.f', (i,), {})
+
+    assert store.stats['captured'] == expected_captured
+
+
+@mock.patch('runtimedocs.core.logging.getLogger', autospec=True)
+@mock.patch('{builtin}.open'.format(builtin=builtin_str))
+def test_decorator_captures_call_inputs(mock_open, mock_getLogger, func):
+    # arrange
+    store = mock.create_autospec(capture.CaptureStore, instance=True)
+    decorated_func = runtimedocs.core.runtimedocs(capture_store=store)(func)
+
+    # call
+    decorated_func('foo', bar='bar')
+
+    # assert
+    store.capture.assert_called_once_with(runtimedocs.helpers.function_key(func), ('foo',), {'bar': 'bar'})
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from .context import runtimedocs
+from runtimedocs import coalescing
+
+
+def test_consecutive_calls_with_same_key_are_coalesced():
+    coalescer = coalescing.CallCoalescer()
+
+    assert coalescer.begin('a') == (False, None)
+    assert coalescer.end(False, 1.0) == (False, None)
+    for duration in (2.0, 3.0):
+        assert coalescer.begin('a') == (True, None)
+        assert coalescer.end(True, duration) == (False, None)
+
+    repeated, summary = coalescer.begin('b')
+
+    assert not repeated
+    assert (summary['key'], summary['count'], summary['min'], summary['mean'], summary['max']) == \
+           ('a', 3, 1.0, 2.0, 3.0)
+    assert summary['first'] <= summary['last']
+
+
+def test_single_call_run_has_no_summary():
+    coalescer = coalescing.CallCoalescer()
+    coalescer.begin('a')
+    coalescer.end(False, 1.0)
+
+    assert coalescer.begin('b') == (False, None)
+
+
+@pytest.mark.parametrize('repeated', [True, False])
+def test_failing_call_ends_the_run(repeated):
+    coalescer = coalescing.CallCoalescer()
+    coalescer.begin('a')
+    coalescer.end(False, 1.0)
+    coalescer.begin('a')
+    coalescer.end(True, 1.0)
+
+    deviating, summary = coalescer.end(repeated, 1.0, failed=True)
+
+    assert deviating == repeated
+    assert summary['count'] == 2
+    assert coalescer.begin('a') == (False, None)
+
+
+def test_outlier_call_deviates_and_starts_a_new_run():
+    coalescer = coalescing.CallCoalescer(outlier_factor=3.0, min_outlier_run=2)
+    coalescer.begin('a')
+    coalescer.end(False, 1.0)
+    coalescer.begin('a')
+    coalescer.end(True, 1.0)
+
+    coalescer.begin('a')
+    deviating, summary = coalescer.end(True, 10.0)
+
+    assert deviating
+    assert summary['count'] == 2
+    assert coalescer.count == 1
+    assert coalescer.begin('a') == (True, None)
+
+
+def test_max_run_length():
+    coalescer = coalescing.CallCoalescer(max_run_length=3)
+    summaries = []
+    for i in range(7):
+        repeated, _ = coalescer.begin('a')
+        summaries.append(coalescer.end(repeated, 1.0)[1])
+
+    assert [summary['count'] for summary in summaries if summary] == [3, 3]
+    # the 7th call continues the run without being logged in details, so it is still summarized.
+    assert coalescer.flush()['count'] == 1
+    assert coalescer.flush() is None
+
+
+def test_coalescing_decorator(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+
+    @runtimedocs.core.runtimedocs(custom_logger_name='test_coalescing', coalesce_repeated_calls=True)
+    def inverse(x):
+        return 1 / x
+
+    for i in range(1, 11):
+        inverse(i)
+    inverse(1.0)
+    with pytest.raises(ZeroDivisionError):
+        inverse(0)
+    inverse(2)
+    inverse(3)
+    coalescing.flush()
+
+    content = tmpdir.join('test_coalescing.runtimedocs.log').read()
+    # 1 for the first int call, 1 for the float one, 1 for the failing one and 1 for the run after the exception.
+    assert content.count('calling [inverse]') == 4
+    assert "[inverse] was called [10] times in a row by [tests.test_coalescing.test_coalescing_decorator] " \
+           "with the called signature (<class 'int'>)" in content
+    assert '[inverse] was called [2] times in a row' in content
+    assert content.count('was called') == 2
+    assert 'ZeroDivisionError' in content
+
+
+def test_coalescing_decorator_reports_every_call_after_max_run_length(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+
+    @runtimedocs.core.runtimedocs(custom_logger_name='test_coalescing_max_run_length', coalesce_repeated_calls=True)
+    def identity(x):
+        return x
+
+    for _ in range(1001):
+        identity(1)
+    identity('a')
+    coalescing.flush()
+
+    content = tmpdir.join('test_coalescing_max_run_length.runtimedocs.log').read()
+    assert content.count('calling [identity]') == 2
+    assert '[identity] was called [1000] times in a row' in content
+    # the 1001st call continued the run without being logged in details.
+    assert '[identity] was called [1] times in a row' in content
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+import math
+
+import pytest
+
+from .context import runtimedocs
+from runtimedocs import columnar
+
+numpy = pytest.importorskip('numpy')
+
+
+@pytest.mark.parametrize('args,kwargs,expected', [
+    ((), {}, -1),
+    ((1, 2.0), {}, -1),
+    (([1, 2], 'abc'), {'d': {}}, 5),
+])
+def test_args_len(args, kwargs, expected):
+    assert columnar.args_len(args, kwargs) == expected
+
+
+def test_exporter_writes_bounded_chunks_and_appends(tmpdir):
+    directory = str(tmpdir.join('columns'))
+    exporter = columnar.ColumnarExporter(directory, chunk_size=4)
+    for i in range(10):
+        exporter.record('mod.f' if i % 2 else 'mod.g', float(i), i / 10.0, 0.0, columnar.SUCCESS, 1, 0, i)
+    exporter.flush()
+    assert len(tmpdir.join('columns').listdir('chunk-*.npz')) == 3
+
+    reopened = columnar.ColumnarExporter(directory, chunk_size=4)
+    reopened.record('mod.h', 10.0, 1.0, 0.5, columnar.EXCEPTION, 0, 2, -1)
+    reopened.record('mod.f', 11.0, 1.1, 0.5, columnar.SUCCESS, 0, 2, -1)
+    reopened.flush()
+
+    columns, function_names = columnar.load_columns(directory)
+    assert function_names == ['mod.g', 'mod.f', 'mod.h']
+    assert columns['timestamp'].tolist() == [float(i) for i in range(12)]
+    assert columns['function'].dtype == numpy.int32
+    names = numpy.array(function_names)[columns['function']]
+    assert names.tolist()[-3:] == ['mod.f', 'mod.h', 'mod.f']
+    assert columns['outcome'].sum() == 1
+    assert len(list(columnar.iter_chunks(directory))) == 4
+
+
+def test_decorator_exports_call_metrics(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    exporter = columnar.ColumnarExporter(str(tmpdir.join('columns')))
+
+    @runtimedocs.core.runtimedocs(custom_logger_name='test_columnar', columnar_exporter=exporter)
+    def mysum(elements, start=0):
+        return sum(elements, start)
+
+    mysum([1, 2])
+    mysum([1, 2, 3], start=1)
+    with pytest.raises(TypeError):
+        mysum(['a'])
+    exporter.flush()
+
+    columns, function_names = columnar.load_columns(str(tmpdir.join('columns')))
+    assert function_names == [runtimedocs.helpers.function_key(mysum)]
+    assert columns['outcome'].tolist() == [columnar.SUCCESS, columnar.SUCCESS, columnar.EXCEPTION]
+    assert columns['n_args'].tolist() == [1, 1, 1]
+    assert columns['n_kwargs'].tolist() == [0, 1, 0]
+    assert columns['args_len'].tolist() == [2, 3, 1]
+    assert (columns['duration'] >= 0).all() and (columns['cpu_time'] >= 0).all()
+
+
+def test_convert_logs(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+
+    @runtimedocs.core.runtimedocs(custom_logger_name='test_columnar_convert')
+    def mysum(elements, start=0):
+        return sum(elements, start)
+
+    mysum([1, 2])
+    mysum((1, 2, 3), start=1)
+    with pytest.raises(TypeError):
+        mysum(['a'])
+
+    directory = str(tmpdir.join('columns'))
+    assert columnar.main([directory, 'test_columnar_convert.runtimedocs.log']) == 0
+
+    columns, function_names = columnar.load_columns(directory)
+    assert function_names == ['{}.mysum'.format(__name__)]
+    assert columns['outcome'].tolist() == [columnar.SUCCESS, columnar.SUCCESS, columnar.EXCEPTION]
+    assert columns['n_kwargs'].tolist() == [0, 1, 0]
+    assert columns['args_len'].tolist() == [2, 3, 1]
+    assert not math.isnan(columns['timestamp'][0])
+    assert math.isnan(columns['duration'][2]) and math.isnan(columns['cpu_time'][0])
+
+
+def test_decorators_share_the_exporter_of_a_same_directory(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+
+    @runtimedocs.core.runtimedocs(custom_logger_name='test_columnar_shared_f', columnar_exporter='columns')
+    def f(x):
+        return x
+
+    @runtimedocs.core.runtimedocs(custom_logger_name='test_columnar_shared_g', columnar_exporter='columns')
+    def g(x):
+        return x
+
+    for i in range(3):
+        f(i)
+    for i in range(5):
+        g(i)
+    columnar.shared_exporter('columns').flush()
+
+    columns, function_names = columnar.load_columns('columns')
+    assert function_names == [runtimedocs.helpers.function_key(f), runtimedocs.helpers.function_key(g)]
+    assert columns['function'].tolist() == [0] * 3 + [1] * 5
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import threading
+
+import pytest
+
+from .context import mock, builtin_str, runtimedocs
+from .fixtures import func
+
+governor = runtimedocs.governor
+
+
+def feed(gov, n_calls, duration, overhead):
+    transitions = []
+    for _ in range(n_calls):
+        transition = gov.record(gov.call_level(), duration, overhead)
+        if transition is not None:
+            transitions.append(transition)
+    return transitions
+
+
+def test_governor_degrades_step_by_step_to_pass_through():
+    gov = governor.OverheadGovernor(budget=1.0, window=10)
+
+    transitions = feed(gov, 100, duration=1e-6, overhead=1e-4)
+
+    assert [new for _, new, _ in transitions] == [governor.SAMPLED, governor.AGGREGATE, governor.PASSTHROUGH]
+    assert gov.mode == governor.PASSTHROUGH
+
+
+def test_governor_stays_in_full_mode_under_budget():
+    gov = governor.OverheadGovernor(budget=1.0, window=10)
+
+    transitions = feed(gov, 100, duration=1e-2, overhead=1e-4)
+
+    assert transitions == []
+    assert gov.mode == governor.FULL
+
+
+def test_governor_recovers_when_overhead_drops():
+    gov = governor.OverheadGovernor(budget=1.0, window=10, probe_every=5, smoothing=1.0)
+    feed(gov, 100, duration=1e-6, overhead=1e-4)
+    assert gov.mode == governor.PASSTHROUGH
+
+    transitions = feed(gov, 100, duration=1e-2, overhead=1e-4)
+
+    assert [new for _, new, _ in transitions] == [governor.AGGREGATE, governor.SAMPLED, governor.FULL]
+    assert gov.mode == governor.FULL
+
+
+@pytest.mark.parametrize('mode,expected_levels', [
+    (governor.FULL, [governor.FULL] * 4),
+    (governor.SAMPLED, [governor.FULL, governor.AGGREGATE, governor.FULL, governor.AGGREGATE]),
+    (governor.AGGREGATE, [governor.FULL, governor.AGGREGATE, governor.FULL, governor.AGGREGATE]),
+    (governor.PASSTHROUGH, [governor.FULL, governor.PASSTHROUGH, governor.FULL, governor.PASSTHROUGH]),
+])
+def test_governor_call_level(mode, expected_levels):
+    gov = governor.OverheadGovernor(budget=1.0, sample_every=2, probe_every=2)
+    gov.mode = mode
+
+    levels = []
+    for calls_in_mode in range(4):
+        gov.calls_in_mode = calls_in_mode
+        levels.append(gov.call_level())
+
+    assert levels == expected_levels
+
+
+def test_governor_summary_resets_aggregates():
+    gov = governor.OverheadGovernor(budget=1.0, aggregate_every=2)
+
+    assert not gov.aggregate(0.1)
+    assert gov.aggregate(0.3, failed=True)
+    summary = gov.summary()
+
+    assert summary.startswith('2 calls (1 exceptions) aggregated')
+    assert gov.summary() is None
+
+
+@mock.patch('runtimedocs.core.OverheadGovernor.call_level', autospec=True, return_value=governor.PASSTHROUGH)
+@mock.patch('runtimedocs.core.logging.getLogger', autospec=True)
+@mock.patch('{builtin}.open'.format(builtin=builtin_str))
+def test_pass_through_calls_are_not_logged(mock_open, mock_getLogger, mock_call_level, func):
+    # arrange
+    func.return_value = 'bla'
+    decorated_func = runtimedocs.core.runtimedocs(overhead_budget=1.0)(func)
+
+    # call
+    res = decorated_func('foo')
+
+    # assert
+    assert res == 'bla'
+    assert func.call_count == 1
+    assert mock_getLogger().info.call_count == 0
+
+
+def test_governor_decides_once_per_window():
+    gov = governor.OverheadGovernor(budget=1.0, window=10, smoothing=1.0)
+    feed(gov, 10, duration=1e-2, overhead=1e-4)
+
+    # the overhead exceeds the budget right after a decision, the next one is only taken 10 calls later.
+    assert feed(gov, 9, duration=1e-6, overhead=1e-4) == []
+    assert len(feed(gov, 1, duration=1e-6, overhead=1e-4)) == 1
+
+
+@mock.patch('runtimedocs.core.logging.getLogger', autospec=True)
+@mock.patch('{builtin}.open'.format(builtin=builtin_str))
+def test_aggregates_are_logged_on_every_transition_and_flush(mock_open, mock_getLogger, func):
+    # arrange
+    func.return_value = 'bla'
+    decorated_func = runtimedocs.core.runtimedocs(overhead_budget=1.0)(func)
+    logger = mock_getLogger()
+
+    # call
+    with mock.patch('runtimedocs.core.OverheadGovernor.call_level', autospec=True,
+                    return_value=governor.AGGREGATE):
+        with mock.patch('runtimedocs.core.OverheadGovernor.record', autospec=True,
+                        side_effect=[None, (governor.AGGREGATE, governor.PASSTHROUGH, 2.0), None]):
+            decorated_func('foo')
+            decorated_func('foo')
+            logged_on_transition = [call[0][0] for call in logger.info.call_args_list]
+            decorated_func('foo')
+    logger.info.reset_mock()
+    governor.flush()
+
+    # assert
+    assert any('2 calls (0 exceptions) aggregated' in msg for msg in logged_on_transition)
+    assert any('1 calls (0 exceptions) aggregated' in call[0][0] for call in logger.info.call_args_list)
+
+
+def test_governor_is_thread_safe():
+    gov = governor.OverheadGovernor(budget=1.0, aggregate_every=3)
+    errors = []
+
+    def aggregate():
+        try:
+            for _ in range(20000):
+                gov.aggregate(1e-6)
+                gov.summary()
+                gov.record(governor.AGGREGATE, 1e-6, 1e-6)
+        except Exception as e:
+            errors.append(e)
+
+    # switch threads as often as possible to make the race likely without a lock.
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=aggregate) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    assert errors == []
+
+
+@pytest.mark.parametrize('exception_to_raise', [None, ValueError])
+def test_instrumentation_errors_do_not_escape_the_wrapper(tmpdir, monkeypatch, exception_to_raise):
+    monkeypatch.chdir(tmpdir)
+
+    @runtimedocs.core.runtimedocs(custom_logger_name='test_instrumentation_errors', overhead_budget=1.0)
+    def identity(x):
+        if exception_to_raise:
+            raise exception_to_raise(x)
+        return x
+
+    with mock.patch('runtimedocs.core.OverheadGovernor.record', autospec=True, side_effect=TypeError('bug')):
+        if exception_to_raise:
+            with pytest.raises(exception_to_raise):
+                identity(1)
+        else:
+            assert identity(1) == 1
+
+    content = tmpdir.join('test_instrumentation_errors.runtimedocs.log').read()
+    assert 'runtimedocs failed to instrument a call of [identity]' in content
+    assert 'TypeError: bug' in content
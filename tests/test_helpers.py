@@ -69,3 +69,31 @@ def test_caller_name():
     outer()
 
 
+
+def test_get_hostname():
+    import platform
+    assert runtimedocs.helpers.get_hostname() == platform.node()
+
+
+def test_lazy_plugin_parsers():
+    plugin_parsers = runtimedocs.helpers.LazyPluginParsers()
+    assert plugin_parsers._parsers is None
+
+    plugin_parsers.get("<class 'int'>")
+
+    assert plugin_parsers._parsers is not None
+    assert runtimedocs.helpers.common_types_parsers_dict["<class 'function'>"] == runtimedocs.helpers.function_parser
+
+
+def test_function_key_tells_methods_of_different_classes_apart():
+    class A(object):
+        def process(self):
+            pass
+
+    class B(object):
+        def process(self):
+            pass
+
+    assert runtimedocs.helpers.function_key(A.process) != runtimedocs.helpers.function_key(B.process)
+    assert runtimedocs.helpers.function_key(A.process).endswith('.A.process')
+    assert runtimedocs.helpers.function_key(test_get_hostname) == 'tests.test_helpers.test_get_hostname'
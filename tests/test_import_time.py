@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from import_time import imported_modules
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason='python -X importtime requires python 3.7+')
+@pytest.mark.parametrize('statement', [
+    'import runtimedocs',
+    # decorating a function should not pull the heavy modules either, only calling it does.
+    'from runtimedocs import runtimedocs\n@runtimedocs(custom_logger_name="import_time")\ndef f(): pass',
+])
+def test_import_does_not_pull_heavy_modules(statement):
+    modules = imported_modules(statement)
+
+    assert 'runtimedocs' in modules
+    for heavy_module in ['inspect', 'platform', 'runtimedocs_types_parsers', 'numpy', 'pandas', 'scipy',
+                         'pickle', 'hashlib', 'zlib', 'logging.handlers', 'runtimedocs.capture',
+                         'runtimedocs.rotation', 'runtimedocs.metrics', 'http.server']:
+        assert heavy_module not in modules
+    assert not os.path.exists(os.path.join(ROOT, 'import_time.runtimedocs.log'))
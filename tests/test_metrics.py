@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import socket
+import threading
+
+import pytest
+
+from .context import runtimedocs
+from runtimedocs import metrics
+
+try:
+    from urllib.request import urlopen
+    from urllib.error import HTTPError
+except ImportError:
+    from urllib2 import urlopen, HTTPError
+
+
+def test_function_metrics():
+    function_metrics = metrics.FunctionMetrics('module.func', buckets=(0.1, 1.0))
+    function_metrics.observe(0.05)
+    function_metrics.observe(0.5)
+    function_metrics.observe(5.0, failed=True)
+
+    snapshot = function_metrics.snapshot()
+
+    assert snapshot['calls'] == 3
+    assert snapshot['errors'] == 1
+    assert snapshot['error_rate'] == pytest.approx(1 / 3.0)
+    assert snapshot['duration_sum'] == pytest.approx(5.55)
+    assert snapshot['buckets'] == [(0.1, 1), (1.0, 2), (float('inf'), 3)]
+
+
+def test_function_metrics_sums_the_shards_of_all_threads():
+    function_metrics = metrics.FunctionMetrics('module.func')
+
+    def observe():
+        for _ in range(1000):
+            function_metrics.observe(0.001)
+
+    threads = [threading.Thread(target=observe) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(function_metrics._shards) == 4
+    assert function_metrics.snapshot()['calls'] == 4000
+    # the shards of the threads which are over are folded into the retired total.
+    assert function_metrics._shards == []
+    function_metrics.observe(0.001)
+    assert function_metrics.snapshot()['calls'] == 4001
+    assert len(function_metrics._shards) == 1
+
+
+def test_render_prometheus():
+    registry = metrics.MetricsRegistry(buckets=(0.1,))
+    registry.get('module."func"').observe(0.05)
+    registry.get('module."func"').observe(0.5, failed=True)
+
+    lines = registry.render_prometheus().splitlines()
+
+    assert '# TYPE runtimedocs_call_duration_seconds histogram' in lines
+    assert 'runtimedocs_calls_total{function="module.\\"func\\""} 2' in lines
+    assert 'runtimedocs_errors_total{function="module.\\"func\\""} 1' in lines
+    assert 'runtimedocs_call_duration_seconds_bucket{function="module.\\"func\\"",le="0.1"} 1' in lines
+    assert 'runtimedocs_call_duration_seconds_bucket{function="module.\\"func\\"",le="+Inf"} 2' in lines
+    assert 'runtimedocs_call_duration_seconds_count{function="module.\\"func\\""} 2' in lines
+
+
+def test_render_json():
+    registry = metrics.MetricsRegistry(buckets=(0.1,))
+    registry.get('module.func').observe(0.05, failed=True)
+
+    function_metrics = json.loads(registry.render_json())['functions']['module.func']
+
+    assert function_metrics['calls'] == function_metrics['errors'] == 1
+    assert function_metrics['error_rate'] == 1.0
+    assert function_metrics['buckets'] == {'0.1': 1, '+Inf': 1}
+
+
+def test_decorator_collects_metrics(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    registry = metrics.MetricsRegistry()
+
+    @runtimedocs.core.runtimedocs(custom_logger_name='test_metrics', collect_metrics=registry)
+    def inverse(x):
+        return 1 / x
+
+    inverse(2)
+    with pytest.raises(ZeroDivisionError):
+        inverse(0)
+
+    snapshot = registry.snapshot()[runtimedocs.helpers.function_key(inverse)]
+    assert snapshot['calls'] == 2
+    assert snapshot['errors'] == 1
+    assert snapshot['buckets'][-1][1] == 2
+
+
+def test_server(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    registry = metrics.MetricsRegistry()
+    registry.get('module.func').observe(0.01)
+    server = metrics.start_server(port=0, registry=registry)
+    try:
+        url = 'http://127.0.0.1:{}'.format(server.server_address[1])
+        response = urlopen(url + '/metrics')
+        assert response.headers['Content-Type'].startswith('text/plain')
+        assert 'runtimedocs_calls_total{function="module.func"} 1' in response.read().decode('utf-8')
+
+        assert json.loads(urlopen(url + '/metrics.json').read().decode('utf-8'))['functions']['module.func']
+
+        with pytest.raises(HTTPError):
+            urlopen(url + '/unknown')
+    finally:
+        server.shutdown()
+        server.server_close()
+    # scraping must not create any log file.
+    assert tmpdir.listdir() == []
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='UNIX sockets are not available')
+def test_server_on_unix_socket(tmpdir):
+    registry = metrics.MetricsRegistry()
+    registry.get('module.func').observe(0.01)
+    path = str(tmpdir.join('metrics.sock'))
+    server = metrics.start_server(unix_socket=path, registry=registry)
+    try:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(path)
+        client.sendall(b'GET /metrics.json HTTP/1.0\r\n\r\n')
+        response = b''
+        while True:
+            data = client.recv(4096)
+            if not data:
+                break
+            response += data
+        client.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+        os.remove(path)
+
+    headers, body = response.decode('utf-8').split('\r\n\r\n', 1)
+    assert headers.startswith('HTTP/1.0 200')
+    assert json.loads(body)['functions']['module.func']['calls'] == 1
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+import pytest
+
+from .context import runtimedocs
+from runtimedocs import buffering, rendering
+
+
+class Custom(object):
+    pass
+
+
+@pytest.mark.parametrize('value,expected_policy', [
+    (1, rendering.LATE),
+    ('a', rendering.LATE),
+    (None, rendering.LATE),
+    ((1, ('a', b'b')), rendering.LATE),
+    ((1, [2]), rendering.EAGER),
+    ([1], rendering.COPY),
+    ({'a': 1}, rendering.COPY),
+    ([[1]], rendering.EAGER),
+    ({'a': {'b': 1}}, rendering.EAGER),
+    ({'a': (1, 'b')}, rendering.COPY),
+    ([Custom()], rendering.EAGER),
+    (Custom(), rendering.EAGER),
+])
+def test_resolve_policy(value, expected_policy):
+    assert rendering.resolve_policy(value, rendering.default_render_policies) == expected_policy
+
+
+def test_resolve_policy_of_large_containers_costs_less_than_eager_rendering():
+    values = [list(range(10 ** 6)), dict((i, i) for i in range(3 * 10 ** 5)), tuple(range(10 ** 6))]
+    for value in values:
+        tic = time.time()
+        rendering.resolve_policy(value, rendering.default_render_policies)
+        resolve_duration = time.time() - tic
+        tic = time.time()
+        runtimedocs.helpers.default_type_parser(value)
+        eager_duration = time.time() - tic
+
+        assert resolve_duration < eager_duration
+        assert rendering.resolve_policy(value, rendering.default_render_policies) == rendering.EAGER
+
+    small_list = list(range(rendering.max_checked_items))
+    assert rendering.resolve_policy(small_list, rendering.default_render_policies) == rendering.COPY
+
+
+def test_snapshot():
+    value = [1, 2]
+    assert list(rendering.snapshot(value).items()) == [('type', "<class 'list'>"), ('len', 2), ('id', id(value))]
+    assert 'len' not in rendering.snapshot(1)
+
+
+def test_deferred_arg_copy_is_not_affected_by_later_mutations():
+    value = [1, 2]
+    deferred = rendering.DeferredArg(value, rendering.COPY, runtimedocs.helpers.default_type_parser)
+
+    value.append(3)
+
+    assert deferred() == ["\t type = <class 'list'>", '\t len = 2', '\t value = [1, 2]', '-----']
+
+
+def test_deferred_arg_reports_rendering_errors():
+    def failing_parser(arg):
+        raise ValueError('cannot parse')
+
+    lines = rendering.DeferredArg(1, rendering.LATE, failing_parser)()
+
+    assert "\t type = <class 'int'>" in lines
+    assert "\t rendering_error = ValueError('cannot parse')" in lines
+
+
+def test_deferred_rendering_decorator(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    rendering_threads = []
+    rendered = threading.Event()
+
+    def custom_parser(arg):
+        rendering_threads.append(threading.current_thread().name)
+        rendered.set()
+        return {'custom': 'parsed'}
+
+    @runtimedocs.core.runtimedocs(custom_logger_name='test_deferred_rendering', deferred_rendering=True,
+                                  custom_types_parsers_dict={"<class 'dict'>": custom_parser},
+                                  render_policies={"<class 'set'>": rendering.SUMMARY})
+    def extend(elements, extra, seen):
+        elements.extend(extra)
+        return elements
+
+    elements = [1]
+    seen = set([1, 2])
+    extend(elements, {'a': 1}, seen)
+    elements.append('mutated after the call')
+    # the collector thread drains the buffers every flush_interval seconds.
+    assert rendered.wait(5)
+    buffering.flush()
+
+    content = tmpdir.join('test_deferred_rendering.runtimedocs.log').read()
+    assert 'value = [1]' in content
+    assert "value = [1, 'a']" in content
+    assert 'mutated after the call' not in content
+    assert 'custom = parsed' in content
+    assert 'id = {}'.format(id(seen)) in content
+    assert rendering_threads == ['runtimedocs-collector']
+
+
+def test_deferred_rendering_of_nested_containers(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+
+    @runtimedocs.core.runtimedocs(custom_logger_name='test_deferred_rendering_nested', deferred_rendering=True)
+    def first(elements):
+        return elements[0]
+
+    inner = ['a']
+    first([inner])
+    inner.append('mutated after the call')
+    buffering.flush()
+
+    content = tmpdir.join('test_deferred_rendering_nested.runtimedocs.log').read()
+    assert "value = [['a']]" in content
+    assert 'mutated after the call' not in content
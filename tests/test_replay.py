@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from .context import runtimedocs
+from runtimedocs import capture, replay
+
+
+def append_item(items, item):
+    items.append(item)
+    if item is None:
+        raise ValueError(item)
+    return len(items)
+
+
+@pytest.fixture(scope='function')
+def capture_path(tmpdir):
+    path = str(tmpdir.join('inputs.capture'))
+    store = capture.CaptureStore(path, sample_rate=1)
+    store.capture(runtimedocs.helpers.function_key(append_item), ([],), {'item': 1})
+    store.capture(runtimedocs.helpers.function_key(append_item), ([1, 2],), {'item': None})
+    store.capture('another.function', (), {})
+    store.close()
+    return path
+
+
+def test_replay_reports_latency_distribution(capture_path):
+    report = replay.replay(append_item, capture_path, repeat=5, warmup=2)
+
+    assert report['inputs'] == 2
+    assert report['errors'] == 7
+    assert report['calls'] == 5
+    assert report['min'] <= report['p50'] <= report['p99'] <= report['max']
+
+
+def test_replay_unwraps_decorated_functions(capture_path, monkeypatch, tmpdir):
+    monkeypatch.chdir(tmpdir)
+    decorated = runtimedocs.core.runtimedocs(custom_logger_name='test_replay_unwrap')(append_item)
+
+    report = replay.replay(decorated, capture_path, repeat=1, warmup=0)
+
+    assert report['inputs'] == 2
+    log_file = tmpdir.join('test_replay_unwrap.runtimedocs.log')
+    assert not log_file.check() or not log_file.size()
+
+
+@pytest.mark.parametrize('values,q,expected', [
+    ([], 50, None),
+    ([1], 99, 1),
+    ([1, 2, 3, 4, 5], 50, 3),
+    ([1, 2, 3, 4, 5], 100, 5),
+])
+def test_percentile(values, q, expected):
+    assert replay.percentile(values, q) == expected
+
+
+def test_main(capture_path, capsys):
+    target = '{}:append_item'.format(__name__)
+
+    assert replay.main([capture_path, target, '-n', '2']) == 0
+    assert '[{}] replayed 2 captured inputs'.format(target) in capsys.readouterr().out
+
+
+def test_replay_raises_when_no_input_matches_the_key(capture_path):
+    with pytest.raises(ValueError, match='unknown.function'):
+        replay.replay(append_item, capture_path, key='unknown.function')
+
+
+def test_main_fails_when_a_target_has_no_captured_input(capture_path, capsys):
+    with pytest.raises(SystemExit):
+        replay.main([capture_path, '{}:append_item'.format(__name__), '-k', 'unknown.function'])
+    assert 'no input captured for the key [unknown.function]' in capsys.readouterr().err
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+
+import pytest
+
+from .context import mock, runtimedocs
+from runtimedocs import rotation
+
+
+@pytest.fixture(scope='function')
+def log_path(tmpdir):
+    return str(tmpdir.join('rotated.runtimedocs.log'))
+
+
+def make_logger(name, handler):
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    return logger
+
+
+@pytest.mark.parametrize('compression', ['gzip', 'bz2', 'xz', None])
+def test_size_based_rotation_and_transparent_reading(log_path, compression):
+    handler = rotation.RotatingCompressedFileHandler(log_path, max_bytes=100, backup_count=0,
+                                                     compression=compression)
+    logger = make_logger('test_size_rotation_{}'.format(compression), handler)
+
+    for i in range(20):
+        logger.info('line number {:02d}'.format(i))
+    rotation.compressor.join()
+    handler.close()
+
+    segments = rotation.list_segments(log_path)
+    assert len(segments) > 1
+    if compression:
+        assert all(path.endswith(rotation.compressions[compression][0]) for path in segments)
+    assert os.path.getsize(log_path) < 100
+    assert list(rotation.iter_log_lines(log_path)) == ['line number {:02d}\n'.format(i) for i in range(20)]
+
+
+def test_time_based_rotation(log_path):
+    handler = rotation.RotatingCompressedFileHandler(log_path, interval=60)
+    logger = make_logger('test_time_rotation', handler)
+
+    logger.info('before')
+    with mock.patch('runtimedocs.rotation.time.time', return_value=handler.rollover_at + 1):
+        logger.info('after')
+    rotation.compressor.join()
+    handler.close()
+
+    assert len(rotation.list_segments(log_path)) == 1
+    assert list(rotation.iter_log_lines(log_path)) == ['before\n', 'after\n']
+
+
+def test_retention(log_path):
+    handler = rotation.RotatingCompressedFileHandler(log_path, max_bytes=10, backup_count=2)
+    logger = make_logger('test_retention', handler)
+
+    for i in range(10):
+        logger.info('line number {}'.format(i))
+    rotation.compressor.join()
+    handler.close()
+
+    assert len(rotation.list_segments(log_path)) == 2
+    assert list(rotation.iter_log_lines(log_path)) == ['line number {}\n'.format(i) for i in (7, 8, 9)]
+
+
+def test_unknown_compression(log_path):
+    with pytest.raises(ValueError):
+        rotation.RotatingCompressedFileHandler(log_path, max_bytes=10, compression='rar')
+
+
+def test_decorator_rotates_its_log_file(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+
+    @runtimedocs.core.runtimedocs(custom_logger_name='test_decorator_rotation', log_max_bytes=1000,
+                                  log_backup_count=0)
+    def myadd(a, b):
+        return a + b
+
+    for i in range(10):
+        myadd(i, 1)
+    rotation.compressor.join()
+
+    log_path = str(tmpdir.join('test_decorator_rotation.runtimedocs.log'))
+    assert rotation.list_segments(log_path)
+    assert sum('calling [myadd]' in line for line in rotation.iter_log_lines(log_path)) == 10
+
+
+def test_decorators_share_the_handler_of_a_same_log_file(tmpdir, monkeypatch):
+    monkeypatch.chdir(tmpdir)
+    options = dict(extra_logger_handlers=['all.log'], log_max_bytes=4000, log_backup_count=0)
+
+    @runtimedocs.core.runtimedocs(custom_logger_name='test_shared_rotation_f', **options)
+    def f(x):
+        return x
+
+    @runtimedocs.core.runtimedocs(custom_logger_name='test_shared_rotation_g', **options)
+    def g(x):
+        return x
+
+    for i in range(100):
+        f(i)
+        g(i)
+    rotation.compressor.join()
+
+    lines = list(rotation.iter_log_lines(str(tmpdir.join('all.log'))))
+    assert rotation.list_segments(str(tmpdir.join('all.log')))
+    assert sum('calling [f]' in line for line in lines) == 100
+    assert sum('calling [g]' in line for line in lines) == 100
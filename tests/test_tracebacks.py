@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+import sys
+
+import pytest
+
+from .context import mock, runtimedocs
+from runtimedocs import tracebacks
+
+
+def raise_value_error(message):
+    raise ValueError(message)
+
+
+def catch(func, *args):
+    try:
+        func(*args)
+    except Exception:
+        return sys.exc_info()
+
+
+def test_fingerprint_ignores_the_exception_message():
+    exc_type, _, tb = catch(raise_value_error, 'foo')
+    other_exc_type, _, other_tb = catch(raise_value_error, 'bar')
+
+    fingerprint = tracebacks.fingerprint(exc_type, tb)
+
+    assert fingerprint == tracebacks.fingerprint(other_exc_type, other_tb)
+    assert fingerprint[0] == 'builtins.ValueError'
+    assert [name for _, _, name in fingerprint[1]] == ['catch', 'raise_value_error']
+
+
+def test_fingerprint_depends_on_the_code_locations():
+    exc_type, _, tb = catch(raise_value_error, 'foo')
+    other_exc_type, _, other_tb = catch(lambda: raise_value_error('foo'))
+
+    assert tracebacks.fingerprint(exc_type, tb) != tracebacks.fingerprint(other_exc_type, other_tb)
+
+
+def test_deduplicator():
+    deduplicator = tracebacks.TracebackDeduplicator(interval=60)
+    exc_type, _, tb = catch(raise_value_error, 'foo')
+
+    with mock.patch('runtimedocs.tracebacks.time.time', return_value=1000.0):
+        first = deduplicator.observe(exc_type, tb)
+        second = deduplicator.observe(exc_type, tb)
+    with mock.patch('runtimedocs.tracebacks.time.time', return_value=1060.0):
+        third = deduplicator.observe(exc_type, tb)
+
+    assert first[0] and not second[0] and third[0]
+    assert first[1] == second[1] == third[1]
+    assert [first[2], second[2], third[2]] == [1, 2, 3]
+
+
+def test_deduplicator_forgets_least_recently_seen_fingerprints():
+    deduplicator = tracebacks.TracebackDeduplicator(max_fingerprints=1)
+    exc_type, _, tb = catch(raise_value_error, 'foo')
+    other_exc_type, _, other_tb = catch(lambda: raise_value_error('foo'))
+
+    deduplicator.observe(exc_type, tb)
+    deduplicator.observe(other_exc_type, other_tb)
+
+    assert deduplicator.observe(exc_type, tb)[0]
+
+
+@pytest.mark.parametrize('traceback_dedup_interval,expected_tracebacks', [(60, 1), (None, 3)])
+def test_decorator_deduplicates_tracebacks(tmpdir, monkeypatch, traceback_dedup_interval, expected_tracebacks):
+    monkeypatch.chdir(tmpdir)
+    logger_name = 'test_tracebacks_{}'.format(traceback_dedup_interval)
+
+    @runtimedocs.core.runtimedocs(custom_logger_name=logger_name, traceback_dedup_interval=traceback_dedup_interval)
+    def inverse(x):
+        return 1 / x
+
+    for _ in range(3):
+        with pytest.raises(ZeroDivisionError):
+            inverse(0)
+
+    content = tmpdir.join('{}.runtimedocs.log'.format(logger_name)).read()
+    assert content.count('!!!EXCEPTION!!!') == 3
+    assert content.count('Traceback (most recent call last)') == expected_tracebacks
+    if traceback_dedup_interval:
+        assert 'ZeroDivisionError: division by zero (fingerprint [' in content
+        assert 'seen [3] times' in content